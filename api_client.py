@@ -0,0 +1,135 @@
+import os
+from io import BytesIO
+from types import SimpleNamespace
+from dotenv import load_dotenv
+import requests
+
+from voice_catalog import VoiceCatalog
+
+# Thin client for server.py; app.py uses it when WEATHER_API_URL is set
+load_dotenv()
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "").rstrip("/")
+WEATHER_API_TIMEOUT = float(os.getenv("WEATHER_API_TIMEOUT", "120"))
+TTS_VOICE_CATALOG_TTL = float(os.getenv("TTS_VOICE_CATALOG_TTL", "3600"))
+# The sidebar metrics must never hold up a rerun for long
+WEATHER_METRICS_TIMEOUT = float(os.getenv("WEATHER_METRICS_TIMEOUT", "2"))
+
+
+def get_weather(city: str) -> dict:
+    '''Takes a city name and returns associated current weather details from the service.'''
+    try:
+        response = requests.get(f"{WEATHER_API_URL}/weather", params={"city": city}, timeout=WEATHER_API_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Weather service error: {str(e)}")
+        return {"report": "error getting current weather"}
+
+
+def get_forecast(city: str) -> dict:
+    """
+    Fetch 5-day forecast (3-hour intervals) for the specified city from the service.
+    Returns an empty dict on error.
+    """
+    try:
+        response = requests.get(f"{WEATHER_API_URL}/forecast", params={"city": city}, timeout=WEATHER_API_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Forecast service error: {str(e)}")
+        return {}
+
+
+def text_to_speech(text: str, voice_id: str) -> BytesIO | None:
+    """
+    Convert text to speech through the service.
+
+    Returns:
+        BytesIO | None: Audio stream or None if error occurs
+    """
+    try:
+        response = requests.post(
+            f"{WEATHER_API_URL}/speech",
+            json={"text": text, "voice_id": voice_id},
+            timeout=WEATHER_API_TIMEOUT,
+        )
+        response.raise_for_status()
+        return BytesIO(response.content)
+    except requests.exceptions.RequestException as e:
+        print(f"Speech service error: {str(e)}")
+        return None
+
+
+def _fetch_voices() -> list | None:
+    """
+    Fetch the service's voice list as objects with the attributes VoiceIndex reads.
+    
+    Returns:
+        list | None: List of voice objects or None if the call failed
+    """
+    try:
+        response = requests.get(f"{WEATHER_API_URL}/voices", timeout=WEATHER_API_TIMEOUT)
+        response.raise_for_status()
+        return [
+            SimpleNamespace(**{
+                **voice,
+                "models": [
+                    SimpleNamespace(name=model["name"], languages=[SimpleNamespace(**lang) for lang in model["languages"]])
+                    for model in voice["models"]
+                ],
+            })
+            for voice in response.json()
+        ]
+    except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+        print(f"Voice service error: {str(e)}")
+        return None
+
+
+# Same TTL-cached catalog as tts.py, filled from the service instead of Speechify
+voice_catalog = VoiceCatalog(_fetch_voices, ttl=TTS_VOICE_CATALOG_TTL)
+
+
+def get_voice_catalog() -> VoiceCatalog:
+    """Get the voice catalog backed by the service's /voices endpoint."""
+    return voice_catalog
+
+
+def get_metrics(timeout: float = WEATHER_METRICS_TIMEOUT) -> dict:
+    """
+    Fetch the service's quota, audio cache and weather refresh metrics.
+    Returns an empty dict on error.
+    """
+    try:
+        response = requests.get(f"{WEATHER_API_URL}/metrics", timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Metrics service error: {str(e)}")
+        return {}
+
+
+class RemoteAgent:
+    """
+    Stand-in for the local AgentExecutor: `invoke({"input": ...})` returns
+    {"output": ...}. Keeps the last few turns and sends them with each request.
+    """
+
+    def __init__(self, history_turns: int = 4, parallel: bool = False):
+        self.history_turns = history_turns
+        self.parallel = parallel
+        self.history = []
+
+    def invoke(self, inputs: dict) -> dict:
+        response = requests.post(
+            f"{WEATHER_API_URL}/chat",
+            json={
+                "input": inputs["input"],
+                "history": self.history[-self.history_turns:],
+                "parallel": self.parallel,
+            },
+            timeout=WEATHER_API_TIMEOUT,
+        )
+        response.raise_for_status()
+        output = response.json()
+        self.history.append([inputs["input"], output.get("output", "")])
+        return output
@@ -1,10 +1,31 @@
+import os
 import streamlit as st
 from datetime import datetime
 
-from tools import get_weather, get_forecast,plot_forecast_graph
+from charts import plot_forecast_graph
+from city_index import suggest_cities
 
-from reactagent import reactagent
-from tts import text_to_speech
+# With WEATHER_API_URL set, the UI is a thin client of server.py and calls no API itself
+THIN_CLIENT = bool(os.getenv("WEATHER_API_URL"))
+if THIN_CLIENT:
+    from api_client import get_weather, get_forecast, RemoteAgent, get_voice_catalog
+    from api_client import get_metrics as fetch_service_metrics, text_to_speech as remote_text_to_speech
+
+    # Metrics are informational: at most one short-timeout call to the service per 30 s, not one per rerun
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_service_metrics() -> dict:
+        return fetch_service_metrics()
+else:
+    from tools import get_weather, get_forecast
+    from reactagent import reactagent, parallel_reactagent
+    from tts import text_to_speech_file, text_to_speech_chunked, get_tts_cache_stats, get_voice_catalog
+    from speculative_tts import (
+        start_speculative_synthesis,
+        cancel_speculative_synthesis,
+        wait_for_speculative_synthesis,
+        TTS_SPECULATIVE_WAIT,
+    )
+    from quota import get_metrics
 
 
 # Set page config
@@ -18,7 +39,7 @@ st.markdown("""
 
 # Initialize agent in session state
 if "agent" not in st.session_state:
-    st.session_state.agent = reactagent           #select agent    
+    st.session_state.agent = RemoteAgent() if THIN_CLIENT else reactagent           #select agent    
 
 # Initialize session state for play audio
 # Ensure session state for TTS
@@ -26,6 +47,11 @@ if "last_ai_response" not in st.session_state:
     st.session_state.last_ai_response = None
 if "last_voice_id" not in st.session_state:
     st.session_state.last_voice_id = None
+# Background pre-synthesis of the last answer: (text, voice) it was started for, and its job key
+if "speculative_target" not in st.session_state:
+    st.session_state.speculative_target = None
+if "speculative_key" not in st.session_state:
+    st.session_state.speculative_key = None
 
 
 # Define layout columns
@@ -44,8 +70,57 @@ with st.sidebar:
         "Daniel": "IKne3meq5aSn9XLyUdCD"   # Backward compatibility
     }
     selected_voice_id = voice_map[voice_option]
+
+    # Live filtering over the cached voice catalog (no API call on reruns)
+    with st.expander("🔎 Browse Speechify voices"):
+        voice_index = get_voice_catalog().get_index()
+        if voice_index.voices:
+            gender_filter = st.selectbox("Gender", ["Any"] + voice_index.genders)
+            locale_filter = st.selectbox("Language", ["Any"] + voice_index.locales)
+            tag_filter = st.multiselect("Tags", voice_index.tags)
+            matching_voices = voice_index.filter_voices(
+                gender=None if gender_filter == "Any" else gender_filter,
+                locale=None if locale_filter == "Any" else locale_filter,
+                tags=tag_filter,
+            )
+            voice_names = {voice.id: getattr(voice, "display_name", None) or voice.id for voice in matching_voices}
+            browsed_voice = st.selectbox(
+                f"Matching voices ({len(matching_voices)})",
+                [None] + list(voice_names),
+                format_func=lambda voice_id: "Use voice chosen above" if voice_id is None else voice_names[voice_id],
+            )
+            if browsed_voice:
+                selected_voice_id = browsed_voice
+        else:
+            st.caption("Voice list unavailable.")
     st.session_state.last_voice_id = selected_voice_id
+    # Chunked playback and pre-generation run in this process, so only without the service
+    chunked_playback = pre_generate_voice = False
+    if not THIN_CLIENT:
+        chunked_playback = st.checkbox("⚡ Start playback early (chunked)", value=False,
+                                       help="Synthesize sentences in parallel and play the first one as soon as it is ready")
+        pre_generate_voice = st.checkbox("🚀 Pre-generate voice for answers", value=False,
+                                         help="Start synthesizing each answer in the background as soon as it arrives")
+    st.header("🤖 Assistant Settings")
+    parallel_tool_calls = st.checkbox("🧩 Parallel tool calls", value=False,
+                                      help="Plan all lookups in one step and run them at the same time")
     st.caption("🌍 Powered by Speechify")
+    if THIN_CLIENT:
+        service_metrics = get_service_metrics()
+        cache_stats = service_metrics.get("tts_cache")
+        quota_metrics = service_metrics.get("quota", [])
+    else:
+        cache_stats = get_tts_cache_stats()
+        quota_metrics = get_metrics()
+    if cache_stats:
+        cache_lookups = cache_stats["hits"] + cache_stats["misses"]
+        st.caption(f"🎧 Audio cache hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']}/{cache_lookups})")
+    with st.expander("📊 API quota"):
+        for metric in quota_metrics:
+            st.caption(
+                f"{metric['bucket']} ({metric['priority']}): {metric['acquired']} calls, "
+                f"{metric['rejected']} rejected, avg wait {metric['avg_wait_seconds']:.2f}s"
+            )
 
 # --------------------------
 # 🧾 Current Weather Section
@@ -58,10 +133,17 @@ with col1:
         city = st.text_input('Enter city name:')
         if st.form_submit_button("Get Current Weather"):
             if city.strip():
-                data = get_weather(city.strip())["report"]
+                weather = get_weather(city.strip())
+                data = weather["report"]
                 if data == 'error getting current weather':
                     st.error("❌ Error fetching weather data. Please try again.")
+                    suggestions = suggest_cities(city)
+                    if suggestions:
+                        st.info(f"Did you mean: {', '.join(suggestions)}?")
                 else:
+                    resolved_city = weather.get("query", city.strip())
+                    if resolved_city.split(",")[0].lower() != city.strip().lower():
+                        st.caption(f"Showing results for {resolved_city}")
                     st.success(f"Current weather for {city.title()}:")
                     lines = data.split('\n')
                     for line in lines:
@@ -93,6 +175,9 @@ with st.form('forecast_form'):
                 st.session_state.forecast_key = f"forecast_plot_{forecast_city.strip()}_{interval_count}"
             else:
                 st.error("❌ Could not retrieve forecast data.")
+                suggestions = suggest_cities(forecast_city)
+                if suggestions:
+                    st.info(f"Did you mean: {', '.join(suggestions)}?")
         else:
             st.warning("Please enter a city name.")
 
@@ -124,7 +209,12 @@ with col2:
         st.session_state.last_user_input = user_input 
         with st.spinner("Thinking..."):
             try:
-                response = st.session_state.agent.invoke({"input": user_input})
+                agent = st.session_state.agent
+                if THIN_CLIENT:
+                    agent.parallel = parallel_tool_calls
+                elif parallel_tool_calls:
+                    agent = parallel_reactagent
+                response = agent.invoke({"input": user_input})
                 ai_response = response.get("output", "Sorry, I couldn't understand that.")
                 st.session_state.last_ai_response = ai_response
                 st.chat_message("assistant").markdown(ai_response)
@@ -134,16 +224,52 @@ with col2:
                 st.error(f"⚠️ Error: {str(e)}")
                 st.session_state.last_ai_response = f"⚠️ Error: {str(e)}"
     
+    # Keep the speculative job in sync with the current answer and voice
+    speculative_target = None
+    if pre_generate_voice and st.session_state.last_ai_response and st.session_state.last_voice_id:
+        speculative_target = (st.session_state.last_ai_response, st.session_state.last_voice_id)
+    if not THIN_CLIENT and (speculative_target != st.session_state.speculative_target or (
+        speculative_target and st.session_state.speculative_key is None
+    )):
+        cancel_speculative_synthesis(st.session_state.speculative_key)
+        st.session_state.speculative_key = (
+            start_speculative_synthesis(*speculative_target) if speculative_target else None
+        )
+        st.session_state.speculative_target = speculative_target
+
     if st.session_state.last_ai_response and st.session_state.last_voice_id:
         
         if st.button("🔊 Speak the Response"):
             st.chat_message("user").markdown(st.session_state.last_user_input)
             st.chat_message("assistant").markdown(st.session_state.last_ai_response)
             with st.spinner("🎧 Generating voice..."):
-                audio = text_to_speech(
-                    st.session_state.last_ai_response,
-                    st.session_state.last_voice_id
-                )
+                if THIN_CLIENT:
+                    audio = remote_text_to_speech(
+                        st.session_state.last_ai_response,
+                        st.session_state.last_voice_id
+                    )
+                elif st.session_state.speculative_key:
+                    # Use the pre-generated audio if it is ready shortly; a job still queued behind
+                    # other sessions' work is dropped and the answer synthesized directly
+                    if not wait_for_speculative_synthesis(st.session_state.speculative_key, timeout=TTS_SPECULATIVE_WAIT):
+                        cancel_speculative_synthesis(st.session_state.speculative_key)
+                    st.session_state.speculative_key = None
+                    audio = text_to_speech_file(
+                        st.session_state.last_ai_response,
+                        st.session_state.last_voice_id
+                    )
+                elif chunked_playback:
+                    first_chunk_slot = st.empty()
+                    audio = text_to_speech_chunked(
+                        st.session_state.last_ai_response,
+                        st.session_state.last_voice_id,
+                        on_first_chunk=lambda chunk: first_chunk_slot.audio(chunk, format="audio/mp3", autoplay=True)
+                    )
+                else:
+                    audio = text_to_speech_file(
+                        st.session_state.last_ai_response,
+                        st.session_state.last_voice_id
+                    )
                 if audio:
                     st.audio(audio, format="audio/mp3")
                 else:
@@ -0,0 +1,164 @@
+import os
+import hashlib
+import threading
+import tempfile
+from dotenv import load_dotenv
+
+load_dotenv()
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+
+def make_cache_key(text: str, voice_id: str, model: str) -> str:
+    """
+    Build a content-addressed key for a synthesized clip.
+
+    Args:
+        text (str): Text that was synthesized
+        voice_id (str): Speechify voice ID (after backward-compatibility mapping)
+        model (str): Speechify model name
+
+    Returns:
+        str: Hex digest identifying the (text, voice, model) triple
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{text_hash}:{voice_id}:{model}".encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Persistent MP3 cache on disk, bounded by total size with LRU eviction.
+
+    Entries are stored as raw MP3 bytes in `<cache_dir>/<key>.mp3`; the file
+    mtime is bumped on every hit so eviction drops the least recently used clips.
+    """
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get_path(self, key: str) -> str | None:
+        """Return the file path of a cached clip, or None on a miss."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def lookup(self, key: str) -> tuple[bytes, str] | None:
+        """Return (MP3 bytes, file path) of a cached clip, or None on a miss."""
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read(), path
+        except OSError:
+            # Evicted by another process between utime and open
+            return None
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached MP3 bytes, or None on a miss."""
+        entry = self.lookup(key)
+        return entry[0] if entry else None
+
+    def put(self, key: str, audio_bytes: bytes) -> str | None:
+        """
+        Store MP3 bytes under `key` and evict old entries if over the size bound.
+
+        Returns:
+            str | None: Path of the stored clip, or None if it could not be written
+        """
+        if not audio_bytes or len(audio_bytes) > self.max_bytes:
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file first so readers never see a partial clip
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            path = self._path(key)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"TTS cache write error: {e}")
+            return None
+        self._evict()
+        return path
+
+    def _evict(self):
+        """Remove least recently used clips until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".mp3"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+    def stats(self) -> dict:
+        """
+        Report cache usage for this process.
+
+        Returns:
+            dict: hits, misses, hit_rate (0.0-1.0), entries and size_bytes on disk
+        """
+        entries = 0
+        size_bytes = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".mp3"):
+                        entries += 1
+                        try:
+                            size_bytes += entry.stat().st_size
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size_bytes,
+        }
+
+
+# Shared cache instance used by tts.py
+audio_cache = AudioCache()
@@ -0,0 +1,52 @@
+import streamlit as st
+import plotly.graph_objects as go
+import pandas as pd
+
+# Forecast chart for app.py; kept out of tools.py so the weather backend has no UI imports
+
+
+#graph
+def plot_forecast_graph(parsed_list, limit=40, key="forecast_plot"):
+ 
+
+    df = pd.DataFrame(parsed_list[:limit])
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=df["datetime"],
+        y=df["temp"],
+        mode='lines+markers',
+        name='Temperature (°C)',
+        line=dict(color='orange')
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df["datetime"],
+        y=df["humidity"],
+        mode='lines',
+        name='Humidity (%)',
+        line=dict(color='blue', dash='dot')
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df["datetime"],
+        y=df["wind"],
+        mode='lines',
+        name='Wind Speed (m/s)',
+        line=dict(color='green', dash='dash')
+    ))
+
+    fig.update_layout(
+        title="📈 Weather Forecast Trends",
+        xaxis_title="Date & Time",
+        yaxis_title="Values",
+        hovermode="x unified",
+        template="plotly_white",
+        autosize=True,
+        margin=dict(l=20, r=20, t=40, b=20),
+        height=450
+    )
+
+    st.markdown("### 📊 Forecast Graph")
+    st.plotly_chart(fig, use_container_width=True, key=key)
@@ -0,0 +1,107 @@
+import os
+import re
+import random
+import hashlib
+from dotenv import load_dotenv
+
+load_dotenv()
+# Chunks whose word-shingle Jaccard similarity reaches this are treated as duplicates
+RAG_DEDUP_THRESHOLD = float(os.getenv("RAG_DEDUP_THRESHOLD", "0.85"))
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+# 16 bands of 4 rows: pairs from about 0.5 similarity up become candidates, then get verified exactly
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1234)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str) -> set[int]:
+    """Hashed word 5-grams of the lower-cased text."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+        for gram in grams
+    }
+
+
+def minhash(shingle_set: set[int]) -> tuple[int, ...]:
+    """MinHash signature of a shingle set."""
+    if not shingle_set:
+        return (0,) * NUM_PERM
+    return tuple(min((a * x + b) % _PRIME for x in shingle_set) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def deduplicate_chunks(docs: list, threshold: float = RAG_DEDUP_THRESHOLD) -> tuple[list, dict]:
+    """
+    Drop near-duplicate chunks before embedding.
+
+    Candidate pairs come from MinHash LSH banding and are confirmed with the
+    exact shingle Jaccard similarity. The first occurrence of a chunk is kept;
+    the sources of the chunks merged into it are listed in its
+    `duplicate_sources` metadata.
+
+    Args:
+        docs (list): LangChain Documents from the text splitter
+        threshold (float): Minimum Jaccard similarity to treat chunks as duplicates
+
+    Returns:
+        tuple[list, dict]: (kept documents, stats with chunks_in, chunks_out,
+            chunks_removed and chars_removed)
+    """
+    buckets = {}
+    kept = []
+    kept_shingles = []
+    chars_removed = 0
+
+    for doc in docs:
+        doc_shingles = shingles(doc.page_content)
+        signature = minhash(doc_shingles)
+        bands = [
+            (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+            for band in range(LSH_BANDS)
+        ]
+
+        candidates = set()
+        for band in bands:
+            candidates.update(buckets.get(band, ()))
+
+        duplicate_of = None
+        for position in sorted(candidates):
+            if jaccard(doc_shingles, kept_shingles[position]) >= threshold:
+                duplicate_of = position
+                break
+
+        if duplicate_of is not None:
+            original = kept[duplicate_of]
+            source = f"{doc.metadata.get('source', '')}:{doc.metadata.get('page', '')}"
+            original.metadata.setdefault("duplicate_sources", []).append(source)
+            chars_removed += len(doc.page_content)
+            continue
+
+        position = len(kept)
+        kept.append(doc)
+        kept_shingles.append(doc_shingles)
+        for band in bands:
+            buckets.setdefault(band, []).append(position)
+
+    stats = {
+        "chunks_in": len(docs),
+        "chunks_out": len(kept),
+        "chunks_removed": len(docs) - len(kept),
+        "chars_removed": chars_removed,
+    }
+    return kept, stats
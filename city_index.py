@@ -0,0 +1,222 @@
+import os
+import csv
+import bisect
+import threading
+import unicodedata
+from collections import Counter
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+load_dotenv()
+CITY_GAZETTEER_PATH = os.getenv("CITY_GAZETTEER_PATH", os.path.join("data", "cities.csv"))
+# Minimum similarity (0-1) for a spelling correction to be retried after OpenWeather rejects a name
+CITY_FUZZY_THRESHOLD = float(os.getenv("CITY_FUZZY_THRESHOLD", "0.75"))
+# Shorter names are too easily "corrected" into a different real city (York -> Cork)
+CITY_FUZZY_MIN_LENGTH = 5
+
+
+class City(NamedTuple):
+    name: str
+    country: str
+    population: int
+
+    @property
+    def label(self) -> str:
+        """City as OpenWeather's `q` parameter expects it, e.g. "Paris,FR"."""
+        return f"{self.name},{self.country}"
+
+
+def fold(text: str) -> str:
+    """Lower-case, strip accents and punctuation, and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(
+        ch if ch.isalnum() else " "
+        for ch in decomposed
+        if not unicodedata.combining(ch)
+    )
+    return " ".join(stripped.casefold().split())
+
+
+def _trigrams(folded: str) -> set[str]:
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a: str, b: str) -> float:
+    """1 - normalized Levenshtein distance."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return 1 - previous[-1] / max(len(a), len(b))
+
+
+class CityIndex:
+    """
+    In-memory gazetteer index.
+
+    Prefix lookups bisect a sorted array of folded names (a flattened trie);
+    fuzzy lookups collect candidates sharing character trigrams with the query
+    and rank them by edit-distance similarity, then population.
+    """
+
+    def __init__(self, cities: list[City]):
+        self.cities = cities
+        self._folded = [fold(city.name) for city in cities]
+        self._gram_counts = []
+        self._by_name = {}
+        self._trigram_index = {}
+        for i, folded in enumerate(self._folded):
+            self._by_name.setdefault(folded, []).append(i)
+            grams = _trigrams(folded)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigram_index.setdefault(gram, []).append(i)
+        for ids in self._by_name.values():
+            ids.sort(key=lambda i: -cities[i].population)
+        self._sorted_names = sorted(self._by_name)
+
+    @classmethod
+    def load(cls, path: str = CITY_GAZETTEER_PATH) -> "CityIndex":
+        cities = []
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    cities.append(City(row["name"], row["country"].upper(), int(row["population"] or 0)))
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error loading city gazetteer: {e}")
+        return cls(cities)
+
+    @staticmethod
+    def _split_query(query: str) -> tuple[str, str | None]:
+        """Split "Name, CC" into folded name and country code; strip quotes an agent may add."""
+        query = query.strip().strip("'\"` ").strip()
+        name, _, country = query.partition(",")
+        country = country.strip().upper()
+        return fold(name), country if len(country) == 2 else None
+
+    def _has_other_qualifier(self, query: str) -> bool:
+        """True for "Name, <state or anything but a 2-letter country code>"."""
+        qualifier = query.strip().strip("'\"` ").strip().partition(",")[2].strip()
+        return bool(qualifier) and self._split_query(query)[1] is None
+
+    def _filter_country(self, ids: list[int], country: str | None) -> list[int]:
+        if not country:
+            return ids
+        return [i for i in ids if self.cities[i].country == country]
+
+    def exact(self, query: str) -> list[City]:
+        """Cities whose name matches exactly (ignoring case and accents), most populous first."""
+        name, country = self._split_query(query)
+        ids = self._filter_country(self._by_name.get(name, []), country)
+        return [self.cities[i] for i in ids]
+
+    def complete(self, prefix: str, limit: int = 5) -> list[City]:
+        """Cities whose name starts with `prefix`, most populous first."""
+        folded, country = self._split_query(prefix)
+        if not folded:
+            return []
+        start = bisect.bisect_left(self._sorted_names, folded)
+        end = bisect.bisect_left(self._sorted_names, folded + "\uffff")
+        ids = [i for name in self._sorted_names[start:end] for i in self._by_name[name]]
+        ids = self._filter_country(ids, country)
+        ids.sort(key=lambda i: -self.cities[i].population)
+        return [self.cities[i] for i in ids[:limit]]
+
+    def fuzzy(self, query: str, limit: int = 5) -> list[tuple[City, float]]:
+        """Closest cities by spelling, as (city, similarity) pairs, best first."""
+        folded, country = self._split_query(query)
+        if not folded:
+            return []
+        grams = _trigrams(folded)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigram_index.get(gram, ()))
+        candidates = self._filter_country(list(shared), country)
+        # Shortlist by trigram Dice coefficient, then rank the shortlist by edit distance
+        candidates.sort(key=lambda i: -2 * shared[i] / (len(grams) + self._gram_counts[i]))
+        scored = [(self.cities[i], _similarity(folded, self._folded[i])) for i in candidates[:max(limit, 10)]]
+        scored.sort(key=lambda pair: (-pair[1], -pair[0].population))
+        return scored[:limit]
+
+    def resolve(self, query: str) -> City | None:
+        """
+        City for a query when the gazetteer is sure: an exact name match whose
+        matches all share one country, otherwise None.
+
+        Queries with a state or any qualifier other than a 2-letter country code
+        ("Paris,TX,US", "London, Ontario") are left to OpenWeather, and so are
+        names shared across countries (Valencia). Never guesses at spelling; the
+        gazetteer is small and a close match is often a different real city
+        (Bolton -> Boston).
+        """
+        if self._has_other_qualifier(query):
+            return None
+        matches = self.exact(query)
+        if not matches or len({city.country for city in matches}) > 1:
+            return None
+        return matches[0]
+
+    def correct(self, query: str) -> City | None:
+        """Confident spelling correction for a name that is not a known city, otherwise None."""
+        if self._has_other_qualifier(query) or self.exact(query):
+            return None
+        if len(self._split_query(query)[0]) < CITY_FUZZY_MIN_LENGTH:
+            return None
+        fuzzy = self.fuzzy(query, limit=1)
+        if fuzzy and fuzzy[0][1] >= CITY_FUZZY_THRESHOLD:
+            return fuzzy[0][0]
+        return None
+
+
+_city_index = None
+_city_index_lock = threading.Lock()
+
+
+def get_city_index() -> CityIndex:
+    """Return the shared index, loading the gazetteer on first use."""
+    global _city_index
+    if _city_index is None:
+        with _city_index_lock:
+            if _city_index is None:
+                _city_index = CityIndex.load()
+    return _city_index
+
+
+def resolve_city_query(city: str) -> str:
+    """
+    Return the OpenWeather query for a user or agent supplied city name.
+
+    Names the gazetteer places in a single country become "Name,CC"; anything
+    else, including "city,state,country" queries and names shared across
+    countries, is passed through (trimmed) for OpenWeather to decide.
+    """
+    match = get_city_index().resolve(city)
+    return match.label if match else city.strip().strip("'\"` ").strip()
+
+
+def correct_city_query(city: str) -> str | None:
+    """
+    Return a corrected OpenWeather query for a misspelled city name, or None.
+
+    Only meant as a retry after OpenWeather answered 404 for the name as given.
+    """
+    match = get_city_index().correct(city)
+    return match.label if match else None
+
+
+def suggest_cities(text: str, limit: int = 5) -> list[str]:
+    """Autocomplete and spelling suggestions for a partial or misspelled city name."""
+    index = get_city_index()
+    suggestions = [city.label for city in index.complete(text, limit)]
+    if len(suggestions) < limit:
+        for city, score in index.fuzzy(text, limit):
+            if city.label not in suggestions and score >= 0.5:
+                suggestions.append(city.label)
+    return suggestions[:limit]
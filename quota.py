@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", os.path.join("cache", "quota.sqlite3"))
+# Plan limits shared by every worker process using the same QUOTA_DB_PATH
+OPENWEATHER_CALLS_PER_MINUTE = float(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60"))
+SPEECHIFY_CALLS_PER_MINUTE = float(os.getenv("SPEECHIFY_CALLS_PER_MINUTE", "30"))
+# Share of each bucket that background work may not touch, kept for interactive requests
+QUOTA_BACKGROUND_RESERVE = float(os.getenv("QUOTA_BACKGROUND_RESERVE", "0.25"))
+# Longest time a caller waits for a token before the request is rejected
+QUOTA_MAX_WAIT = {
+    "interactive": float(os.getenv("QUOTA_INTERACTIVE_MAX_WAIT", "10")),
+    "background": float(os.getenv("QUOTA_BACKGROUND_MAX_WAIT", "2")),
+}
+
+# bucket name -> (tokens per second, capacity)
+BUCKETS = {
+    "openweather": (OPENWEATHER_CALLS_PER_MINUTE / 60, OPENWEATHER_CALLS_PER_MINUTE),
+    "speechify": (SPEECHIFY_CALLS_PER_MINUTE / 60, SPEECHIFY_CALLS_PER_MINUTE),
+}
+
+_priority = contextvars.ContextVar("quota_priority", default="interactive")
+_local = threading.local()
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no API token became available within the caller's max wait."""
+
+
+@contextmanager
+def priority(level: str):
+    """Run the enclosed API calls with the given priority ("interactive" or "background")."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        directory = os.path.dirname(QUOTA_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(QUOTA_DB_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            "bucket TEXT NOT NULL, priority TEXT NOT NULL, acquired INTEGER NOT NULL DEFAULT 0, "
+            "rejected INTEGER NOT NULL DEFAULT 0, wait_seconds REAL NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (bucket, priority))"
+        )
+        _local.conn = conn
+    return conn
+
+
+def _record(conn: sqlite3.Connection, bucket: str, level: str, acquired: int, rejected: int, waited: float):
+    conn.execute(
+        "INSERT INTO metrics (bucket, priority, acquired, rejected, wait_seconds) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (bucket, priority) DO UPDATE SET acquired = acquired + excluded.acquired, "
+        "rejected = rejected + excluded.rejected, wait_seconds = wait_seconds + excluded.wait_seconds",
+        (bucket, level, acquired, rejected, waited),
+    )
+
+
+def _try_take(conn: sqlite3.Connection, bucket: str, reserve: float) -> float:
+    """
+    Take one token if more than `reserve` would remain.
+
+    Returns:
+        float: 0 if a token was taken, otherwise seconds until one should be available
+    """
+    rate, capacity = BUCKETS[bucket]
+    now = time.time()
+    row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (bucket,)).fetchone()
+    tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+
+    if tokens - 1 >= reserve:
+        tokens -= 1
+        needed = 0.0
+    else:
+        needed = (reserve + 1 - tokens) / rate
+    conn.execute(
+        "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+        (bucket, tokens, now),
+    )
+    return needed
+
+
+def acquire(bucket: str, level: str | None = None) -> float:
+    """
+    Block until one call to `bucket` is allowed under the shared rate limit.
+
+    Background callers may not dip into the reserve kept for interactive
+    requests and give up sooner. If the quota store itself is unusable the
+    call is allowed, so a broken cache directory never takes the app down.
+
+    Args:
+        bucket (str): "openweather" or "speechify"
+        level (str, optional): "interactive" or "background"; defaults to the
+            level set with `priority()`, else interactive
+
+    Returns:
+        float: Seconds spent waiting
+
+    Raises:
+        RateLimitExceeded: If no token became available within the max wait
+    """
+    level = level or _priority.get()
+    reserve = BUCKETS[bucket][1] * QUOTA_BACKGROUND_RESERVE if level == "background" else 0.0
+    deadline = time.time() + QUOTA_MAX_WAIT[level]
+    start = time.time()
+
+    while True:
+        try:
+            conn = _connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                needed = _try_take(conn, bucket, reserve)
+                waited = time.time() - start
+                if needed == 0:
+                    _record(conn, bucket, level, 1, 0, waited)
+                elif time.time() + needed > deadline:
+                    _record(conn, bucket, level, 0, 1, waited)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, OSError) as e:
+            print(f"Quota store error, allowing call: {e}")
+            return time.time() - start
+
+        if needed == 0:
+            return waited
+        if time.time() + needed > deadline:
+            raise RateLimitExceeded(f"{bucket} rate limit reached for {level} request")
+        time.sleep(needed)
+
+
+def drain(bucket: str):
+    """Empty a bucket after the API answered 429, so every process backs off."""
+    try:
+        conn = _connect()
+        conn.execute(
+            "INSERT INTO buckets (name, tokens, updated) VALUES (?, 0, ?) "
+            "ON CONFLICT (name) DO UPDATE SET tokens = 0, updated = excluded.updated",
+            (bucket, time.time()),
+        )
+    except (sqlite3.Error, OSError) as e:
+        print(f"Quota store error: {e}")
+
+
+def get_metrics() -> list[dict]:
+    """
+    Shared counters per bucket and priority, across all processes.
+
+    Returns:
+        list[dict]: bucket, priority, acquired, rejected, wait_seconds and avg_wait_seconds
+    """
+    try:
+        rows = _connect().execute(
+            "SELECT bucket, priority, acquired, rejected, wait_seconds FROM metrics ORDER BY bucket, priority"
+        ).fetchall()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Quota store error: {e}")
+        return []
+    return [
+        {
+            "bucket": bucket,
+            "priority": level,
+            "acquired": acquired,
+            "rejected": rejected,
+            "wait_seconds": wait_seconds,
+            "avg_wait_seconds": wait_seconds / (acquired + rejected) if acquired + rejected else 0.0,
+        }
+        for bucket, level, acquired, rejected, wait_seconds in rows
+    ]
@@ -3,6 +3,9 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_ollama import OllamaEmbeddings
 from langchain_community.vectorstores import FAISS
 import os
+import time
+
+from chunk_dedup import deduplicate_chunks
 
 #create pdf vector store
 def create_pdf_vector_store():
@@ -28,10 +31,23 @@ def create_pdf_vector_store():
         text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
         splits = text_splitter.split_documents(pdf_docs)
         print(f"chunks created: {len(splits)}")
+        #drop near-duplicate chunks (shared boilerplate, repeated sections)
+        splits, dedup_stats = deduplicate_chunks(splits)
+        print(f"near-duplicate chunks removed: {dedup_stats['chunks_removed']} "
+              f"({dedup_stats['chunks_out']} of {dedup_stats['chunks_in']} kept)")
         #embed
         embeddings = OllamaEmbeddings(model="nomic-embed-text")
         #store vector db
+        embed_start = time.perf_counter()
         vector_store = FAISS.from_documents(splits, embeddings)
+        embed_seconds = time.perf_counter() - embed_start
+        #report what deduplication saved, extrapolated from the kept chunks
+        if dedup_stats["chunks_removed"] and splits:
+            seconds_saved = embed_seconds / len(splits) * dedup_stats["chunks_removed"]
+            vector_bytes_saved = vector_store.index.d * 4 * dedup_stats["chunks_removed"]
+            print(f"dedup saved ~{seconds_saved:.1f}s of embedding time and "
+                  f"~{(vector_bytes_saved + dedup_stats['chars_removed']) / 1024:.0f} KiB of index "
+                  f"({vector_bytes_saved / 1024:.0f} KiB vectors, {dedup_stats['chars_removed'] / 1024:.0f} KiB text)")
         
         # Create directory if it doesn't exist
         os.makedirs(vector_store_dir, exist_ok=True)
@@ -4,17 +4,32 @@ from langchain_core.prompts import PromptTemplate
 from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.tools import tool
 from langchain_ollama import OllamaEmbeddings
+from langchain_core.messages import get_buffer_string
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from dotenv import load_dotenv
+import os
+import re
+import json
+import time
+import threading
 
 from rag import create_pdf_vector_store
-from tools import get_weather,get_forecast, get_time_and_date
-from prompt import react_prompt
+from tools import get_weather,get_forecast, get_time_and_date, get_forecast_comparison
+from prompt import react_prompt, parallel_plan_prompt, parallel_answer_prompt
+
+load_dotenv()
+# How long Ollama keeps the models loaded after each request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Seconds between keep-warm pings; 0 disables the loop after the startup warm-up
+OLLAMA_KEEP_WARM_INTERVAL = float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "240"))
+PARALLEL_MAX_TOOL_CALLS = int(os.getenv("PARALLEL_MAX_TOOL_CALLS", "6"))
 
 #initialize vector db
 vector_store = create_pdf_vector_store()
 
 #llm and memory
-llm = ChatOllama(model='mistral', temperature=0.5)
+llm = ChatOllama(model='mistral', temperature=0.5, keep_alive=OLLAMA_KEEP_ALIVE)
 memory = ConversationBufferWindowMemory(k=4, memory_key="chat_history", return_messages=True)
 
 # weather tool
@@ -39,6 +54,12 @@ def get_current_date_time(city: str) -> str:
     """tool takes city name as input and returns the current date and timeas output. you can add numbers with date to get date like tomorrow(add 1), day after tomorrow(add 2)"""
     return get_time_and_date(city)
 
+@tool
+def get_weather_history(city: str) -> str:
+    """tool takes city name as input and compares what was forecast earlier with the weather actually observed
+    over the last 24 hours. use it for questions like how today compared with yesterday's forecast"""
+    return get_forecast_comparison(city)
+
 #pdf retrieval tool
 @tool
 def search_weather_knowledge(query: str)-> str:
@@ -56,11 +77,106 @@ def search_weather_knowledge(query: str)-> str:
 
 #tool list
 #tools = [get_current_weather_tool, get_forecast_weather_tool]
-tools = [get_current_weather, get_forecast_weather, get_current_date_time, search_weather_knowledge]
+tools = [get_current_weather, get_forecast_weather, get_current_date_time, get_weather_history, search_weather_knowledge]
 
 prompt = PromptTemplate.from_template(react_prompt)
 
 agent = create_react_agent(llm, tools, prompt)
+
+#parallel tool agent
+class ParallelToolAgent:
+    """
+    Agent that plans all independent tool calls in one LLM step, runs them
+    concurrently, and answers in a second LLM step, so a multi-city or
+    weather + forecast + time question costs two model round trips.
+    Falls back to the ReAct executor when the plan cannot be parsed.
+    Exposes the same `invoke({"input": ...})` interface as AgentExecutor.
+    """
+
+    def __init__(self, memory, fallback: AgentExecutor):
+        self.memory = memory
+        self.fallback = fallback
+        self.tools_by_name = {t.name: t for t in tools}
+        self.plan_prompt = PromptTemplate.from_template(parallel_plan_prompt)
+        self.answer_prompt = PromptTemplate.from_template(parallel_answer_prompt)
+
+    def _plan(self, query: str, chat_history: str) -> list[dict] | None:
+        plan_text = llm.invoke(self.plan_prompt.format(
+            tools="\n".join(f"{t.name}: {t.description}" for t in tools),
+            tool_names=", ".join(self.tools_by_name),
+            chat_history=chat_history,
+            input=query,
+        )).content
+        match = re.search(r"\{.*\}", plan_text, re.DOTALL)
+        if not match:
+            return None
+        try:
+            plan = json.loads(match.group(0))
+        except ValueError:
+            return None
+        # Anything but a list of calls (null, a string, a missing key) goes to the ReAct fallback
+        calls = plan.get("calls") if isinstance(plan, dict) else None
+        if not isinstance(calls, list):
+            return None
+
+        planned = []
+        for call in calls:
+            if not isinstance(call, dict) or call.get("tool") not in self.tools_by_name:
+                return None
+            step = {"tool": call["tool"], "input": str(call.get("input", "")).strip()}
+            if step not in planned:
+                planned.append(step)
+        return planned[:PARALLEL_MAX_TOOL_CALLS]
+
+    def _run_tool(self, call: dict) -> str:
+        try:
+            return str(self.tools_by_name[call["tool"]].invoke(call["input"]))
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    def invoke(self, inputs: dict) -> dict:
+        query = inputs["input"]
+        chat_history = get_buffer_string(self.memory.load_memory_variables({})["chat_history"])
+
+        calls = self._plan(query, chat_history)
+        if calls is None:
+            return self.fallback.invoke(inputs)
+
+        observations = []
+        if calls:
+            with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+                results = list(executor.map(self._run_tool, calls))
+            observations = [
+                f"{call['tool']}({call['input']}):\n{result}" for call, result in zip(calls, results)
+            ]
+
+        output = llm.invoke(self.answer_prompt.format(
+            chat_history=chat_history,
+            observations="\n\n".join(observations) or "(no tool results)",
+            input=query,
+        )).content.strip()
+        self.memory.save_context({"input": query}, {"output": output})
+        return {"input": query, "output": output}
+
+def build_agent(history=None, parallel: bool = False):
+    """
+    Create an agent with its own memory, optionally seeded with earlier
+    (user input, assistant output) turns. Used by the HTTP service, where chat
+    history travels with each request instead of living in one worker.
+    """
+    session_memory = ConversationBufferWindowMemory(k=4, memory_key="chat_history", return_messages=True)
+    for user_input, ai_output in history or []:
+        session_memory.save_context({"input": user_input}, {"output": ai_output})
+    executor = AgentExecutor(
+        agent=agent,
+        tools=tools,
+        memory=session_memory,
+        handle_parsing_errors=True,
+        verbose=True,
+        max_iterations=5
+    )
+    return ParallelToolAgent(session_memory, executor) if parallel else executor
+
 reactagent = AgentExecutor(
     agent=agent,
     tools=tools,
@@ -69,3 +185,26 @@ reactagent = AgentExecutor(
     verbose=True,  # Optional: shows the agent's thought process
     max_iterations=5
 )
+
+parallel_reactagent = ParallelToolAgent(memory, reactagent)
+
+#model warm-up
+def warm_up_models():
+    """Load mistral and nomic-embed-text into Ollama so the first user turn is not a cold start."""
+    try:
+        warm_llm = ChatOllama(model='mistral', num_predict=1, keep_alive=OLLAMA_KEEP_ALIVE)
+        warm_llm.invoke("hi")
+        OllamaEmbeddings(model="nomic-embed-text").embed_query("weather")
+        return True
+    except Exception as e:
+        print(f"Model warm-up failed: {str(e)}")
+        return False
+
+def _keep_models_warm():
+    warm_up_models()
+    # Re-ping before Ollama's idle timeout so both models stay resident
+    while OLLAMA_KEEP_WARM_INTERVAL > 0:
+        time.sleep(OLLAMA_KEEP_WARM_INTERVAL)
+        warm_up_models()
+
+threading.Thread(target=_keep_models_warm, name="ollama-warm-up", daemon=True).start()
@@ -0,0 +1,182 @@
+import os
+import time
+import threading
+from collections import Counter, deque
+from dotenv import load_dotenv
+
+load_dotenv()
+# Current conditions: OpenWeather updates them at most every 10 minutes
+WEATHER_CURRENT_TTL = float(os.getenv("WEATHER_CURRENT_TTL", "600"))
+# Forecasts: OpenWeather publishes 3-hour steps, so entries expire at the next step boundary
+FORECAST_INTERVAL = 3 * 3600
+# How long past expiry data may still be served while a refresh runs
+WEATHER_MAX_STALE = float(os.getenv("WEATHER_MAX_STALE", "1800"))
+# Background API calls the scheduler may make per hour
+WEATHER_REFRESH_BUDGET = int(os.getenv("WEATHER_REFRESH_BUDGET", "120"))
+# Number of most-requested cities kept warm
+WEATHER_HOT_CITIES = int(os.getenv("WEATHER_HOT_CITIES", "10"))
+WEATHER_REFRESH_TICK = float(os.getenv("WEATHER_REFRESH_TICK", "60"))
+
+
+def current_weather_expiry(fetched_at: float) -> float:
+    return fetched_at + WEATHER_CURRENT_TTL
+
+
+def forecast_expiry(fetched_at: float) -> float:
+    """Expire at the next 3-hour UTC boundary, when OpenWeather issues a new step."""
+    return (fetched_at // FORECAST_INTERVAL + 1) * FORECAST_INTERVAL
+
+
+def normalize_city(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+
+class RefreshScheduler:
+    """
+    In-process cache for weather lookups with stale-while-revalidate and
+    proactive refresh of the most requested cities.
+
+    Fetchers are registered per kind ("weather", "forecast") and must raise on
+    failure so errors are never cached. A fetcher may answer from a local copy
+    unless called with refresh=True, and reports when its data was fetched so
+    expiry is computed from the real fetch time.
+    """
+
+    def __init__(self, budget_per_hour: int = WEATHER_REFRESH_BUDGET, hot_cities: int = WEATHER_HOT_CITIES,
+                 tick: float = WEATHER_REFRESH_TICK, max_stale: float = WEATHER_MAX_STALE):
+        self.budget_per_hour = budget_per_hour
+        self.hot_cities = hot_cities
+        self.tick = tick
+        self.max_stale = max_stale
+        self._fetchers = {}
+        # (kind, city key) -> [value, fetched_at, expires_at, city as requested]
+        self._entries = {}
+        self._requests = Counter()
+        self._inflight = set()
+        self._call_times = deque()
+        self._last_decay = time.time()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = Counter()
+
+    def register(self, kind: str, fetch, expiry):
+        """
+        Register a fetcher.
+
+        Args:
+            kind (str): Lookup kind, e.g. "weather"
+            fetch (callable): fetch(city, refresh=False) -> (value, fetched_at), raising on failure
+            expiry (callable): expiry(fetched_at) -> timestamp when the value goes stale
+        """
+        self._fetchers[kind] = (fetch, expiry)
+
+    def get(self, kind: str, city: str):
+        """
+        Return the value for (kind, city): fresh from cache, stale while a refresh
+        runs in the background, or fetched synchronously on a miss.
+        """
+        key = normalize_city(city)
+        now = time.time()
+        with self._lock:
+            self._requests[key] += 1
+            entry = self._entries.get((kind, key))
+
+        if entry and now < entry[2]:
+            self.stats["fresh_hits"] += 1
+            return entry[0]
+        if entry and now < entry[2] + self.max_stale:
+            self.stats["stale_hits"] += 1
+            self._refresh_async(kind, key, entry[3])
+            return entry[0]
+
+        self.stats["misses"] += 1
+        value = self._fetch(kind, key, city, refresh=False)
+        self._ensure_thread()
+        return value
+
+    def _fetch(self, kind: str, key: str, city: str, refresh: bool):
+        fetch, expiry = self._fetchers[kind]
+        value, fetched_at = fetch(city, refresh=refresh)
+        with self._lock:
+            self._entries[(kind, key)] = [value, fetched_at, expiry(fetched_at), city]
+        return value
+
+    def _refresh(self, kind: str, key: str, city: str):
+        try:
+            self._fetch(kind, key, city, refresh=True)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            # Keep serving the previous value until it is too stale
+            print(f"Background refresh error for {kind} {city}: {e}")
+            self.stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._inflight.discard((kind, key))
+
+    def _refresh_async(self, kind: str, key: str, city: str):
+        with self._lock:
+            if (kind, key) in self._inflight:
+                return
+            self._inflight.add((kind, key))
+        threading.Thread(target=self._refresh, args=(kind, key, city), daemon=True).start()
+
+    def _take_budget(self, now: float) -> bool:
+        """Consume one background call from the hourly budget, if any is left."""
+        while self._call_times and now - self._call_times[0] >= 3600:
+            self._call_times.popleft()
+        if len(self._call_times) >= self.budget_per_hour:
+            return False
+        self._call_times.append(now)
+        return True
+
+    def hot_cities_list(self) -> list[str]:
+        with self._lock:
+            return [key for key, _ in self._requests.most_common(self.hot_cities)]
+
+    def run_once(self):
+        """Refresh hot entries that expire before the next tick, within the budget."""
+        now = time.time()
+        due = []
+        with self._lock:
+            # Halve request counts hourly so the hot set follows recent demand, and drop
+            # entries too stale to serve so cities asked about once do not pile up
+            if now - self._last_decay >= 3600:
+                self._requests = Counter({k: c // 2 for k, c in self._requests.items() if c // 2})
+                expired = [k for k, entry in self._entries.items() if now >= entry[2] + self.max_stale]
+                for k in expired:
+                    del self._entries[k]
+                self.stats["evictions"] += len(expired)
+                self._last_decay = now
+            hot = [key for key, _ in self._requests.most_common(self.hot_cities)]
+            for key in hot:
+                for kind in self._fetchers:
+                    entry = self._entries.get((kind, key))
+                    if entry and entry[2] - now <= self.tick and (kind, key) not in self._inflight:
+                        due.append((entry[2], kind, key, entry[3]))
+
+        # Soonest to expire first, so a tight budget goes where it matters
+        for _, kind, key, city in sorted(due):
+            with self._lock:
+                if not self._take_budget(now):
+                    self.stats["budget_skips"] += 1
+                    break
+                self._inflight.add((kind, key))
+            self._refresh(kind, key, city)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.tick)
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Refresh scheduler error: {e}")
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="weather-refresh", daemon=True)
+                self._thread.start()
+
+
+# Shared scheduler used by tools.py
+refresh_scheduler = RefreshScheduler()
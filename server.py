@@ -0,0 +1,115 @@
+import os
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+import tts
+from tools import get_weather, get_forecast
+from reactagent import build_agent
+from refresh_scheduler import refresh_scheduler
+from quota import get_metrics, RateLimitExceeded
+
+# Run with several workers:  python server.py  or  uvicorn server:app --workers 4
+# Every worker shares the on-disk audio cache, the weather store and the SQLite
+# quota database; only the in-memory refresh cache is per worker.
+load_dotenv()
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "4"))
+
+app = FastAPI(title="Weather Assistant API")
+
+
+class ChatRequest(BaseModel):
+    input: str
+    # Earlier [user input, assistant output] turns; the service keeps no session state
+    history: list[tuple[str, str]] = []
+    # Plan independent tool calls in one step and run them concurrently
+    parallel: bool = False
+
+
+class SpeechRequest(BaseModel):
+    text: str
+    voice_id: str = "scott"
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/weather")
+def weather(city: str = Query(..., min_length=1)):
+    data = get_weather(city)
+    if "readable" not in data:
+        raise HTTPException(status_code=502, detail="error getting current weather")
+    return data
+
+
+@app.get("/forecast")
+def forecast(city: str = Query(..., min_length=1)):
+    data = get_forecast(city)
+    if "parsed" not in data:
+        raise HTTPException(status_code=502, detail="error getting forecast")
+    return data
+
+
+@app.post("/chat")
+def chat(request: ChatRequest):
+    try:
+        response = build_agent(request.history[-4:], parallel=request.parallel).invoke({"input": request.input})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    return {"output": response.get("output", "Sorry, I couldn't understand that.")}
+
+
+@app.post("/speech")
+def speech(request: SpeechRequest):
+    if not tts.speechify_client:
+        raise HTTPException(status_code=503, detail="Speechify client not initialized")
+    try:
+        audio_bytes, _ = tts.synthesize_bytes(request.text, request.voice_id)
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        print(f"TTS error: {e}")
+        raise HTTPException(status_code=502, detail="error generating audio")
+    return Response(content=audio_bytes, media_type="audio/mpeg")
+
+
+def _voice_to_dict(voice) -> dict:
+    """Plain JSON form of a Speechify voice, with the fields VoiceIndex filters on."""
+    return {
+        "id": voice.id,
+        "display_name": getattr(voice, "display_name", None),
+        "gender": getattr(voice, "gender", None),
+        "tags": list(getattr(voice, "tags", None) or []),
+        "models": [
+            {
+                "name": model.name,
+                "languages": [{"locale": lang.locale} for lang in getattr(model, "languages", None) or []],
+            }
+            for model in getattr(voice, "models", None) or []
+        ],
+    }
+
+
+@app.get("/voices")
+def voices():
+    # Served from the TTL-cached catalog, so clients never list voices on Speechify themselves
+    return [_voice_to_dict(voice) for voice in tts.get_available_voices()]
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "quota": get_metrics(),
+        "tts_cache": tts.get_tts_cache_stats(),
+        "weather_refresh": dict(refresh_scheduler.stats),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("server:app", host=SERVER_HOST, port=SERVER_PORT, workers=SERVER_WORKERS)
@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dotenv import load_dotenv
+
+import tts
+from audio_cache import make_cache_key
+from quota import priority
+
+load_dotenv()
+# Cap on speculative jobs queued or running at once, shared by every session in this process
+TTS_SPECULATIVE_MAX_JOBS = int(os.getenv("TTS_SPECULATIVE_MAX_JOBS", "2"))
+# How long a user's click waits for its own pre-generation before synthesizing directly
+TTS_SPECULATIVE_WAIT = float(os.getenv("TTS_SPECULATIVE_WAIT", "1"))
+
+_executor = ThreadPoolExecutor(max_workers=TTS_SPECULATIVE_MAX_JOBS, thread_name_prefix="speculative-tts")
+# Reentrant: Future.cancel() runs the done callbacks (_forget_job) in the cancelling thread
+_lock = threading.RLock()
+# key -> [future, number of sessions interested in it]
+_jobs = {}
+
+
+def speculative_job_key(text: str, voice_id: str) -> str:
+    """Return the job key for (text, voice); it is also the audio cache key."""
+    speechify_voice_id, model = tts.resolve_voice_and_model(text, voice_id)
+    return make_cache_key(text, speechify_voice_id, model)
+
+
+def _run_job(text: str, voice_id: str):
+    try:
+        # Speculative work must not take Speechify quota from users waiting on audio
+        with priority("background"):
+            tts.synthesize_bytes(text, voice_id)
+    except Exception as e:
+        print(f"Speculative TTS error: {e}")
+
+
+def _forget_job(key: str, future):
+    with _lock:
+        job = _jobs.get(key)
+        if job and job[0] is future:
+            del _jobs[key]
+
+
+def start_speculative_synthesis(text: str, voice_id: str) -> str | None:
+    """
+    Start synthesizing `text` in the background so it is cached before it is requested.
+
+    Args:
+        text (str): Text to convert to speech
+        voice_id (str): Voice ID to use for synthesis
+
+    Returns:
+        str | None: Job key, or None if speech is unavailable or the job cap is reached
+    """
+    if not tts.speechify_client or not text:
+        return None
+
+    key = speculative_job_key(text, voice_id)
+    with _lock:
+        if key in _jobs:
+            _jobs[key][1] += 1
+            return key
+        if len(_jobs) >= TTS_SPECULATIVE_MAX_JOBS:
+            return None
+        future = _executor.submit(_run_job, text, voice_id)
+        _jobs[key] = [future, 1]
+    future.add_done_callback(lambda f: _forget_job(key, f))
+    return key
+
+
+def cancel_speculative_synthesis(key: str | None):
+    """
+    Drop interest in a speculative job; it is cancelled if no other session wants it.
+
+    A job that is already talking to Speechify runs to completion and its audio
+    stays in the cache.
+    """
+    if not key:
+        return
+    with _lock:
+        job = _jobs.get(key)
+        if not job:
+            return
+        job[1] -= 1
+        if job[1] <= 0:
+            # A cancelled job is removed by its _forget_job callback
+            job[0].cancel()
+
+
+def wait_for_speculative_synthesis(key: str | None, timeout: float | None = None) -> bool:
+    """
+    Block until a speculative job finishes.
+
+    Returns:
+        bool: True if a job was pending and finished, False if there was none or it timed out
+    """
+    if not key:
+        return False
+    with _lock:
+        job = _jobs.get(key)
+    if not job:
+        return False
+    try:
+        job[0].result(timeout=timeout)
+        return True
+    except (FutureTimeoutError, CancelledError):
+        return False
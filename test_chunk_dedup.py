@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test suite for near-duplicate chunk removal before embedding.
+"""
+
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from chunk_dedup import deduplicate_chunks, shingles, jaccard
+
+PARAGRAPH = (
+    "Heavy rain is expected across the northern region on Tuesday with local flooding "
+    "possible near rivers, and temperatures will stay between eight and twelve degrees "
+    "while winds from the west reach forty kilometres per hour along the coast."
+)
+
+def _doc(text, source, page):
+    """Stand-in for a LangChain Document."""
+    return SimpleNamespace(page_content=text, metadata={"source": source, "page": page})
+
+class TestChunkDedup(unittest.TestCase):
+    """Test cases for MinHash LSH deduplication."""
+    
+    def test_keeps_first_and_records_duplicate_sources(self):
+        """Test that the first chunk survives and lists where its duplicates came from."""
+        docs = [
+            _doc(PARAGRAPH, "a.pdf", 1),
+            _doc("Sunny spells in the south with light winds and a high of twenty degrees.", "a.pdf", 2),
+            _doc(PARAGRAPH, "b.pdf", 4),
+            _doc("  " + PARAGRAPH.upper().replace("COAST.", "SHORE!"), "c.pdf", 7),
+        ]
+        
+        kept, stats = deduplicate_chunks(docs)
+        
+        self.assertEqual(kept, [docs[0], docs[1]])
+        self.assertEqual(docs[0].metadata["duplicate_sources"], ["b.pdf:4", "c.pdf:7"])
+        self.assertNotIn("duplicate_sources", docs[1].metadata)
+        self.assertEqual(stats["chunks_in"], 4)
+        self.assertEqual(stats["chunks_out"], 2)
+        self.assertEqual(stats["chunks_removed"], 2)
+        self.assertEqual(stats["chars_removed"], len(docs[2].page_content) + len(docs[3].page_content))
+    
+    def test_threshold_keeps_partial_overlap(self):
+        """Test that chunks below the similarity threshold are all kept."""
+        half = PARAGRAPH[:len(PARAGRAPH) // 2]
+        docs = [_doc(PARAGRAPH, "a.pdf", 1), _doc(half + " Completely different closing words follow here now.", "a.pdf", 2)]
+        similarity = jaccard(shingles(docs[0].page_content), shingles(docs[1].page_content))
+        self.assertLess(similarity, 0.85)
+        
+        kept, stats = deduplicate_chunks(docs, threshold=0.85)
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(stats["chunks_removed"], 0)
+    
+    def test_empty_input(self):
+        """Test that no chunks produce empty results."""
+        kept, stats = deduplicate_chunks([])
+        self.assertEqual(kept, [])
+        self.assertEqual(stats["chunks_removed"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test suite for the offline city gazetteer used to build OpenWeather queries.
+"""
+
+import unittest
+import os
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from city_index import CityIndex, City
+
+GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.csv")
+
+class TestCityIndex(unittest.TestCase):
+    """Test cases for exact resolution and spelling suggestions."""
+    
+    def setUp(self):
+        """Load the bundled gazetteer."""
+        self.index = CityIndex.load(GAZETTEER)
+    
+    def test_exact_match_ignores_case_and_accents(self):
+        """Test that names known in a single country resolve to it."""
+        self.assertEqual(self.index.resolve("  'tokyo' ").label, "Tokyo,JP")
+        self.assertEqual(self.index.resolve("london, gb").label, "London,GB")
+        self.assertEqual(self.index.resolve("London, CA").label, "London,CA")
+        self.assertEqual(self.index.resolve("'monterrey'").label, "Monterrey,MX")
+    
+    def test_ambiguous_names_are_left_to_openweather(self):
+        """Test that names shared across countries are not decided by population."""
+        for name in ["Valencia", "Cordoba", "London", "Paris", "Birmingham"]:
+            with self.subTest(name=name):
+                self.assertIsNone(self.index.resolve(name))
+    
+    def test_state_and_other_qualifiers_pass_through(self):
+        """Test that city,state,country and free-text qualifiers are never rewritten."""
+        for name in ["Paris,TX,US", "Paris, Texas", "London, Ontario", "Birmingham, Alabama", "Paris,TX"]:
+            with self.subTest(name=name):
+                self.assertIsNone(self.index.resolve(name))
+                self.assertIsNone(self.index.correct(name))
+        self.assertIsNone(self.index.correct("Birmingam, Alabama"))
+    
+    def test_resolve_does_not_rewrite_real_cities(self):
+        """Test that real cities missing from the gazetteer are never swapped for a close name."""
+        for name in ["Bolton", "Parma", "Monterey", "Cordoba (Spain)", "York, US"]:
+            with self.subTest(name=name):
+                self.assertIsNone(self.index.resolve(name))
+    
+    def test_correction_is_only_for_unknown_names(self):
+        """Test that spelling corrections are offered for typos but not for known names."""
+        self.assertEqual(self.index.correct("Londn").label, "London,GB")
+        self.assertIsNone(self.index.correct("London"))
+        # Too short to correct safely
+        self.assertIsNone(self.index.correct("Yrk"))
+    
+    def test_complete_prefix(self):
+        """Test that prefix completion returns the most populous cities first."""
+        index = CityIndex([City("Springfield", "US", 10), City("Spring", "US", 50), City("Paris", "FR", 100)])
+        self.assertEqual([city.name for city in index.complete("spr")], ["Spring", "Springfield"])
+        self.assertEqual(index.complete(""), [])
+
+if __name__ == "__main__":
+    unittest.main()
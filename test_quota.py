@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test suite for the shared SQLite token buckets that rate-limit API calls.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import quota
+from quota import acquire, drain, get_metrics, priority, RateLimitExceeded
+
+class TestQuota(unittest.TestCase):
+    """Test cases for reserve, rejection and draining of token buckets."""
+    
+    def setUp(self):
+        """Point the quota store at a temporary database with a small, slow bucket."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patches = [
+            patch.object(quota, "QUOTA_DB_PATH", os.path.join(self.tmp_dir.name, "quota.sqlite3")),
+            # 4 calls, refilling far slower than the test runs
+            patch.object(quota, "BUCKETS", {"openweather": (0.001, 4.0)}),
+            patch.object(quota, "QUOTA_BACKGROUND_RESERVE", 0.25),
+            patch.object(quota, "QUOTA_MAX_WAIT", {"interactive": 0.0, "background": 0.0}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        quota._local.conn = None
+    
+    def tearDown(self):
+        quota._local.conn.close()
+        quota._local.conn = None
+        self.tmp_dir.cleanup()
+    
+    def _metric(self, level):
+        return next(m for m in get_metrics() if m["bucket"] == "openweather" and m["priority"] == level)
+    
+    def test_background_leaves_reserve_for_interactive(self):
+        """Test that background callers stop at the reserve while interactive ones may use it."""
+        for _ in range(3):
+            acquire("openweather", "background")
+        with self.assertRaises(RateLimitExceeded):
+            acquire("openweather", "background")
+        
+        acquire("openweather", "interactive")
+        with self.assertRaises(RateLimitExceeded):
+            acquire("openweather", "interactive")
+        
+        self.assertEqual((self._metric("background")["acquired"], self._metric("background")["rejected"]), (3, 1))
+        self.assertEqual((self._metric("interactive")["acquired"], self._metric("interactive")["rejected"]), (1, 1))
+    
+    def test_priority_context_sets_default_level(self):
+        """Test that calls inside priority("background") are accounted as background."""
+        with priority("background"):
+            acquire("openweather")
+        acquire("openweather")
+        self.assertEqual(self._metric("background")["acquired"], 1)
+        self.assertEqual(self._metric("interactive")["acquired"], 1)
+    
+    def test_drain_blocks_every_caller(self):
+        """Test that draining after a 429 empties the bucket for all priorities."""
+        acquire("openweather")
+        drain("openweather")
+        with self.assertRaises(RateLimitExceeded):
+            acquire("openweather", "interactive")
+    
+    def test_state_is_shared_through_the_database(self):
+        """Test that a second connection (as in another process) sees the same bucket."""
+        for _ in range(4):
+            acquire("openweather")
+        quota._local.conn.close()
+        quota._local.conn = None
+        with self.assertRaises(RateLimitExceeded):
+            acquire("openweather")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test suite for the parallel tool-planning agent.
+"""
+
+import unittest
+import os
+import sys
+from unittest.mock import Mock, patch
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# No keep-warm loop and no vector store build while testing
+os.environ.setdefault("OLLAMA_KEEP_WARM_INTERVAL", "0")
+with patch("rag.create_pdf_vector_store", return_value=None):
+    import reactagent
+from reactagent import ParallelToolAgent
+
+class TestParallelToolAgent(unittest.TestCase):
+    """Test cases for plan parsing and the ReAct fallback."""
+    
+    def setUp(self):
+        """Create an agent with stub memory and fallback."""
+        self.memory = Mock()
+        self.memory.load_memory_variables.return_value = {"chat_history": []}
+        self.fallback = Mock()
+        self.fallback.invoke.return_value = {"output": "from react"}
+        self.agent = ParallelToolAgent(self.memory, self.fallback)
+    
+    def _plan(self, plan_text):
+        with patch.object(reactagent, "llm") as mock_llm:
+            mock_llm.invoke.return_value = Mock(content=plan_text)
+            return self.agent._plan("weather in Paris and Rome?", "")
+    
+    def test_plan_parses_and_deduplicates_calls(self):
+        """Test that a plan wrapped in prose is parsed and repeated calls are dropped."""
+        calls = self._plan(
+            'Here is the plan: {"calls": ['
+            '{"tool": "get_current_weather", "input": "Paris"}, '
+            '{"tool": "get_current_weather", "input": " Paris "}, '
+            '{"tool": "get_forecast_weather", "input": "Rome"}]}'
+        )
+        self.assertEqual(calls, [
+            {"tool": "get_current_weather", "input": "Paris"},
+            {"tool": "get_forecast_weather", "input": "Rome"},
+        ])
+        self.assertEqual(self._plan('{"calls": []}'), [])
+    
+    def test_malformed_plans_return_none(self):
+        """Test that every unusable plan shape is rejected instead of raising."""
+        for plan_text in [
+            '{"calls": null}',
+            '{"calls": "get_current_weather"}',
+            '{"plan": []}',
+            '{"calls": [{"tool": "unknown_tool", "input": "Paris"}]}',
+            '{"calls": ["get_current_weather"]}',
+            '{"calls": [',
+            "no plan at all",
+        ]:
+            with self.subTest(plan_text=plan_text):
+                self.assertIsNone(self._plan(plan_text))
+    
+    def test_invoke_falls_back_to_react(self):
+        """Test that an unusable plan hands the question to the ReAct executor."""
+        with patch.object(reactagent, "llm") as mock_llm:
+            mock_llm.invoke.return_value = Mock(content='{"calls": null}')
+            result = self.agent.invoke({"input": "weather in Paris?"})
+        
+        self.assertEqual(result, {"output": "from react"})
+        self.fallback.invoke.assert_called_once_with({"input": "weather in Paris?"})
+        self.memory.save_context.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,9 @@ This test suite ensures backward compatibility and functionality.
 import unittest
 import os
 import sys
+import tempfile
+import base64
+import time
 from unittest.mock import Mock, patch, MagicMock
 from io import BytesIO
 from dotenv import load_dotenv
@@ -15,6 +18,27 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from tts import text_to_speech, get_available_voices, filter_voice_models
+from tts import split_into_chunks, join_mp3_chunks, text_to_speech_chunked
+from audio_cache import AudioCache, make_cache_key
+from voice_catalog import VoiceCatalog, VoiceIndex
+import quota
+
+_quota_dir = None
+
+def setUpModule():
+    """Keep synthesis under test off the shared quota database and its Speechify tokens."""
+    global _quota_dir
+    _quota_dir = tempfile.TemporaryDirectory()
+    patcher = patch.object(quota, "QUOTA_DB_PATH", os.path.join(_quota_dir.name, "quota.sqlite3"))
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+    quota._local.conn = None
+
+def tearDownModule():
+    if getattr(quota._local, "conn", None):
+        quota._local.conn.close()
+        quota._local.conn = None
+    _quota_dir.cleanup()
 
 class TestTTSMigration(unittest.TestCase):
     """Test cases for TTS migration functionality."""
@@ -190,6 +214,240 @@ class TestTTSMigration(unittest.TestCase):
         self.assertEqual(len(combined), 1)
         self.assertEqual(combined[0], "model1")
 
+class TestAudioCache(unittest.TestCase):
+    """Test cases for the on-disk synthesized speech cache."""
+    
+    def setUp(self):
+        """Create an isolated cache directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = AudioCache(cache_dir=self.tmp_dir.name, max_bytes=1000)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_cache_key_depends_on_text_voice_and_model(self):
+        """Test that every part of the key changes the digest."""
+        base = make_cache_key("hello", "scott", "simba-english")
+        self.assertEqual(base, make_cache_key("hello", "scott", "simba-english"))
+        self.assertNotEqual(base, make_cache_key("hello!", "scott", "simba-english"))
+        self.assertNotEqual(base, make_cache_key("hello", "other", "simba-english"))
+        self.assertNotEqual(base, make_cache_key("hello", "scott", "simba-multilingual"))
+    
+    def test_put_get_and_hit_rate(self):
+        """Test round trip as bytes and file path, and hit rate reporting."""
+        self.assertIsNone(self.cache.get("missing"))
+        path = self.cache.put("abc", b"mp3-bytes")
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(self.cache.get("abc"), b"mp3-bytes")
+        self.assertEqual(self.cache.get_path("abc"), path)
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertEqual(stats["entries"], 1)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used clip is evicted when over size."""
+        self.cache.put("old", b"a" * 400)
+        self.cache.put("newer", b"b" * 400)
+        os.utime(self.cache._path("old"), (1, 1))
+        os.utime(self.cache._path("newer"), (2, 2))
+        self.cache.put("newest", b"c" * 400)
+        
+        self.assertIsNone(self.cache.get("old"))
+        self.assertEqual(self.cache.get("newer"), b"b" * 400)
+        self.assertEqual(self.cache.get("newest"), b"c" * 400)
+    
+    def test_text_to_speech_uses_cache(self):
+        """Test that identical text and voice are synthesized only once."""
+        import tts
+        mock_client = MagicMock()
+        mock_client.tts.audio.speech.return_value = Mock(audio_data=base64.b64encode(b"audio").decode())
+        
+        with patch.object(tts, "speechify_client", mock_client), patch.object(tts, "audio_cache", self.cache):
+            first = text_to_speech("Cached text", "21m00Tcm4TlvDq8ikWAM")
+            second = text_to_speech("Cached text", "scott")
+        
+        self.assertEqual(first.getvalue(), b"audio")
+        self.assertEqual(second.getvalue(), b"audio")
+        self.assertEqual(mock_client.tts.audio.speech.call_count, 1)
+    
+    def test_text_to_speech_file_counts_one_lookup(self):
+        """Test that a cold request is one miss and returns the cached file."""
+        import tts
+        mock_client = MagicMock()
+        mock_client.tts.audio.speech.return_value = Mock(audio_data=base64.b64encode(b"audio").decode())
+        
+        with patch.object(tts, "speechify_client", mock_client), patch.object(tts, "audio_cache", self.cache):
+            path = tts.text_to_speech_file("Cold text", "scott")
+        
+        self.assertEqual(path, self.cache._path(make_cache_key("Cold text", "scott", "simba-english")))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 1))
+    
+    def test_text_to_speech_file_falls_back_when_not_cached(self):
+        """Test that a clip too large for the cache is still returned."""
+        import tts
+        mock_client = MagicMock()
+        mock_client.tts.audio.speech.return_value = Mock(audio_data=base64.b64encode(b"a" * 2000).decode())
+        
+        with patch.object(tts, "speechify_client", mock_client), patch.object(tts, "audio_cache", self.cache):
+            audio = tts.text_to_speech_file("Long text", "scott")
+        
+        self.assertIsInstance(audio, BytesIO)
+        self.assertEqual(audio.getvalue(), b"a" * 2000)
+        self.assertEqual(mock_client.tts.audio.speech.call_count, 1)
+
+class TestChunkedSynthesis(unittest.TestCase):
+    """Test cases for sentence-chunked parallel synthesis."""
+    
+    def test_split_into_chunks(self):
+        """Test that the first sentence stands alone and the rest are packed."""
+        text = "First sentence. Second one! Third one? Fourth."
+        self.assertEqual(
+            split_into_chunks(text, max_chars=25),
+            ["First sentence.", "Second one! Third one?", "Fourth."]
+        )
+        self.assertEqual(split_into_chunks("   "), [])
+    
+    def test_join_mp3_chunks_strips_inner_tags(self):
+        """Test that ID3 tags between clips are removed."""
+        id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x02xx"
+        id3v1 = b"TAG" + b"\x00" * 125
+        first = id3v2 + b"frames1" + id3v1
+        second = id3v2 + b"frames2" + id3v1
+        self.assertEqual(join_mp3_chunks([first, second]), id3v2 + b"frames1frames2" + id3v1)
+    
+    def test_chunked_reports_first_chunk_and_joins(self):
+        """Test that the first chunk is handed out early and all chunks are joined."""
+        import tts
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        mock_client = MagicMock()
+        mock_client.tts.audio.speech.side_effect = lambda **kw: Mock(
+            audio_data=base64.b64encode(kw["input"].encode()).decode()
+        )
+        first_chunks = []
+        
+        with patch.object(tts, "speechify_client", mock_client), \
+                patch.object(tts, "audio_cache", AudioCache(cache_dir=tmp_dir.name)):
+            result = text_to_speech_chunked("One. Two.", "scott", on_first_chunk=first_chunks.append)
+        
+        self.assertEqual(first_chunks, [b"One."])
+        self.assertEqual(result.getvalue(), b"One.Two.")
+
+class TestSpeculativeSynthesis(unittest.TestCase):
+    """Test cases for background pre-synthesis of answers."""
+    
+    def test_pre_synthesized_audio_is_served_from_cache(self):
+        """Test that a finished speculative job makes the next request a cache hit."""
+        import tts
+        import speculative_tts
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        mock_client = MagicMock()
+        mock_client.tts.audio.speech.return_value = Mock(audio_data=base64.b64encode(b"audio").decode())
+        
+        with patch.object(tts, "speechify_client", mock_client), \
+                patch.object(tts, "audio_cache", AudioCache(cache_dir=tmp_dir.name)):
+            key = speculative_tts.start_speculative_synthesis("Early answer.", "scott")
+            self.assertIsNotNone(key)
+            speculative_tts.wait_for_speculative_synthesis(key, timeout=5)
+            result = text_to_speech("Early answer.", "scott")
+        
+        self.assertEqual(result.getvalue(), b"audio")
+        self.assertEqual(mock_client.tts.audio.speech.call_count, 1)
+    
+    def test_no_job_without_client(self):
+        """Test that nothing is scheduled when Speechify is not configured."""
+        import tts
+        import speculative_tts
+        with patch.object(tts, "speechify_client", None):
+            self.assertIsNone(speculative_tts.start_speculative_synthesis("Hello.", "scott"))
+    
+    def test_cancel_queued_job(self):
+        """Test that cancelling a job still waiting for a worker drops it without blocking."""
+        import threading
+        import tts
+        import speculative_tts
+        release = threading.Event()
+        self.addCleanup(release.set)
+        # Keep every worker busy so the speculative job stays queued
+        for _ in range(speculative_tts.TTS_SPECULATIVE_MAX_JOBS):
+            speculative_tts._executor.submit(release.wait, 5)
+        
+        with patch.object(tts, "speechify_client", MagicMock()), \
+                patch.object(tts, "synthesize_bytes") as mock_synthesize:
+            key = speculative_tts.start_speculative_synthesis("Queued answer.", "scott")
+            self.assertIsNotNone(key)
+            # A click does not wait for other sessions' jobs ahead of this one
+            started = time.time()
+            self.assertFalse(speculative_tts.wait_for_speculative_synthesis(key, timeout=0.1))
+            self.assertLess(time.time() - started, 1)
+            canceller = threading.Thread(target=speculative_tts.cancel_speculative_synthesis, args=(key,))
+            canceller.start()
+            canceller.join(timeout=5)
+            self.assertFalse(canceller.is_alive())
+            self.assertNotIn(key, speculative_tts._jobs)
+            self.assertFalse(speculative_tts.wait_for_speculative_synthesis(key, timeout=1))
+            release.set()
+        mock_synthesize.assert_not_called()
+
+class TestVoiceCatalog(unittest.TestCase):
+    """Test cases for the cached, indexed voice catalog."""
+    
+    def _voice(self, voice_id, gender, locales, tags):
+        voice = Mock()
+        voice.id = voice_id
+        voice.gender = gender
+        voice.tags = tags
+        model = Mock()
+        model.name = f"{voice_id}-model"
+        model.languages = [Mock(locale=locale) for locale in locales]
+        voice.models = [model]
+        return voice
+    
+    def test_index_filters_by_intersection(self):
+        """Test that combined filters intersect and keep the list order."""
+        voices = [
+            self._voice("a", "Male", ["en-US"], ["timbre:deep"]),
+            self._voice("b", "female", ["en-US", "es-ES"], ["timbre:deep"]),
+            self._voice("c", "male", ["en-GB"], []),
+        ]
+        index = VoiceIndex(voices)
+        self.assertEqual(index.genders, ["female", "male"])
+        self.assertEqual(index.filter_models(gender="male"), ["a-model", "c-model"])
+        self.assertEqual(index.filter_models(locale="en-US", tags=["timbre:deep"]), ["a-model", "b-model"])
+        self.assertEqual(index.filter_models(gender="female", locale="en-GB"), [])
+        self.assertEqual([v.id for v in index.filter_voices()], ["a", "b", "c"])
+    
+    def test_catalog_caches_and_refreshes_in_background(self):
+        """Test that reads within the TTL do not fetch and stale reads refresh once."""
+        fetch = Mock(side_effect=[[self._voice("a", "male", [], [])], [self._voice("b", "male", [], [])]])
+        catalog = VoiceCatalog(fetch, ttl=3600)
+        
+        self.assertEqual([v.id for v in catalog.get_voices()], ["a"])
+        self.assertEqual([v.id for v in catalog.get_voices()], ["a"])
+        self.assertEqual(fetch.call_count, 1)
+        
+        catalog.invalidate()
+        # Stale data is served immediately while the refresh runs
+        self.assertEqual([v.id for v in catalog.get_voices()], ["a"])
+        for _ in range(100):
+            if catalog.peek_index().voices[0].id == "b":
+                break
+            time.sleep(0.01)
+        self.assertEqual([v.id for v in catalog.get_voices()], ["b"])
+        self.assertEqual(fetch.call_count, 2)
+    
+    def test_no_fetch_without_client(self):
+        """Test that listing voices without a client neither fails nor uses quota."""
+        import tts
+        with patch.object(tts, "speechify_client", None), patch.object(tts, "acquire") as mock_acquire:
+            self.assertEqual(tts._fetch_voices(), [])
+        mock_acquire.assert_not_called()
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for the complete TTS system."""
     
@@ -232,6 +490,10 @@ def run_migration_tests():
     
     # Add test cases
     suite.addTests(loader.loadTestsFromTestCase(TestTTSMigration))
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestChunkedSynthesis))
+    suite.addTests(loader.loadTestsFromTestCase(TestSpeculativeSynthesis))
+    suite.addTests(loader.loadTestsFromTestCase(TestVoiceCatalog))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     
     # Run tests
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test suite for the local append-only weather store.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from unittest.mock import Mock, patch
+
+from weather_store import WeatherStore
+
+DAY = 24 * 3600
+
+class TestWeatherStore(unittest.TestCase):
+    """Test cases for appending, querying and compacting segments."""
+    
+    def setUp(self):
+        """Create an isolated store."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = WeatherStore(root=self.tmp_dir.name, compact_at=3)
+        # Noon UTC, so +-1 hour stays within the day
+        self.noon = (int(time.time()) // DAY) * DAY + DAY // 2
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def _segment_count(self, kind, city, ts):
+        partition = self.store._partition(kind, city, time.strftime("%Y-%m-%d", time.gmtime(ts)))
+        return len(self.store._segments(partition, 0, float("inf")))
+    
+    def test_append_and_query_across_days(self):
+        """Test that a window spanning two days returns rows in ts order."""
+        self.store.append("weather", "London", [
+            {"ts": self.noon, "fetched_at": self.noon, "temp": 2.0},
+            {"ts": self.noon - DAY, "fetched_at": self.noon, "temp": 1.0},
+            {"ts": self.noon - 2 * DAY, "fetched_at": self.noon, "temp": 0.0},
+        ])
+        
+        rows = self.store.query("weather", "london", self.noon - DAY - 60, self.noon + 60)
+        self.assertEqual([row["temp"] for row in rows], [1.0, 2.0])
+        rows = self.store.query("weather", "London", self.noon - 60, self.noon + 60, columns=["temp"])
+        self.assertEqual(rows, [{"temp": 2.0}])
+        self.assertEqual(self.store.query("forecast", "London", self.noon - DAY, self.noon + 60), [])
+    
+    def test_compaction_merges_segments(self):
+        """Test that a partition is merged into one segment without losing rows."""
+        for i in range(3):
+            self.store.append("weather", "Paris", [{"ts": self.noon + i, "fetched_at": self.noon + i, "temp": i}])
+        
+        self.assertEqual(self._segment_count("weather", "Paris", self.noon), 1)
+        rows = self.store.query("weather", "Paris", self.noon - 60, self.noon + 60)
+        self.assertEqual([row["temp"] for row in rows], [0, 1, 2])
+        
+        self.store.append("weather", "Paris", [{"ts": self.noon + 3, "fetched_at": self.noon + 3, "temp": 3}])
+        self.assertEqual(self._segment_count("weather", "Paris", self.noon), 2)
+    
+    def test_latest_fetch(self):
+        """Test that only the rows of the newest fetch since the cutoff are returned."""
+        now = time.time()
+        first, second = now - 600, now - 60
+        self.store.append("forecast", "Rome", [
+            {"ts": first, "fetched_at": first, "valid_at": now + 3600},
+            {"ts": first, "fetched_at": first, "valid_at": now + 7200},
+        ])
+        self.store.append("forecast", "Rome", [
+            {"ts": second, "fetched_at": second, "valid_at": now + 3600},
+            {"ts": second, "fetched_at": second, "valid_at": now + 7200},
+        ])
+        
+        rows = self.store.latest_fetch("forecast", "Rome", first)
+        self.assertEqual([row["fetched_at"] for row in rows], [second, second])
+        self.assertEqual(self.store.latest_fetch("forecast", "Rome", second + 1), [])
+    
+    def test_latest_fetch_with_lagging_observation_time(self):
+        """Test that an observation measured before the cutoff but fetched after it is found."""
+        now = time.time()
+        self.store.append("weather", "Oslo", [{"ts": now - 900, "fetched_at": now, "temp": 5.0}])
+        rows = self.store.latest_fetch("weather", "Oslo", now - 600)
+        self.assertEqual([row["temp"] for row in rows], [5.0])
+
+class TestForecastComparison(unittest.TestCase):
+    """Test that the history tool reads what the weather tools stored."""
+    
+    def test_compare_after_fetch(self):
+        """Test that a fetch for a bare name is found by the comparison for the same name."""
+        import tools
+        from refresh_scheduler import RefreshScheduler
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        scheduler = RefreshScheduler()
+        scheduler.register("weather", tools._fetch_weather, tools.current_weather_expiry)
+        payload = {
+            "dt": time.time() - 300,
+            "name": "Oslo",
+            "main": {"temp": 4.5, "feels_like": 2.0, "pressure": 1012, "humidity": 80},
+            "weather": [{"description": "light rain"}],
+            "visibility": 9000,
+            "wind": {"speed": 3.1},
+        }
+        response = Mock(status_code=200, json=Mock(return_value=payload))
+        
+        with patch.object(tools, "weather_store", WeatherStore(root=tmp_dir.name)), \
+                patch.object(tools, "refresh_scheduler", scheduler), \
+                patch.object(tools, "acquire"), \
+                patch.object(tools.requests, "get", return_value=response) as mock_get:
+            self.assertEqual(tools.get_weather("Oslo")["query"], "Oslo,NO")
+            comparison = tools.get_forecast_comparison("Oslo")
+        
+        self.assertEqual(mock_get.call_args.kwargs["params"]["q"], "Oslo,NO")
+        self.assertNotIn("No stored observations", comparison)
+        self.assertIn("4.5°C", comparison)
+
+if __name__ == "__main__":
+    unittest.main()
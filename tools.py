@@ -1,158 +1,255 @@
 from dotenv import load_dotenv
 import os
+import json
+import time
 import requests
 from datetime import datetime, timedelta, timezone
-import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
+
+from refresh_scheduler import (
+    refresh_scheduler,
+    current_weather_expiry,
+    forecast_expiry,
+    FORECAST_INTERVAL,
+    WEATHER_CURRENT_TTL,
+)
+from weather_store import weather_store
+from city_index import resolve_city_query, correct_city_query
+from quota import acquire, drain, RateLimitExceeded
 
 
 load_dotenv()
 weather_api = os.getenv('openweather_api')
 
 #current weather
-def get_weather(city: str) -> dict:
-    '''Takes a city name and returns associated current weather details.'''
+def _format_weather(weather_data: dict) -> dict:
+    '''Builds the report and readable summary from a current weather API payload.'''
+    report = (
+        f"📍 CITY: {weather_data['name']}\n"
+        f"🌡️ TEMPERATURE: {weather_data['main']['temp']}°C\n"
+        f"🤗 FEELS LIKE: {weather_data['main']['feels_like']}°C\n"
+        f"📈 PRESSURE: {weather_data['main']['pressure']} hPa\n"
+        f"🌥️ CONDITIONS: {weather_data['weather'][0]['description'].capitalize()}\n"
+        f"👁️ VISIBILITY: {weather_data['visibility']} m\n"
+        f"💧 HUMIDITY: {weather_data['main']['humidity']}%\n"
+        f"💨 WIND: {weather_data['wind']['speed']} km/h"
+    )
+    readable = (
+        f"The current weather in {weather_data['name']} is {weather_data['weather'][0]['description'].capitalize()}, "
+        f"with a temperature of {weather_data['main']['temp']}°C, feeling like {weather_data['main']['feels_like']}°C. "
+        f"Humidity is at {weather_data['main']['humidity']}%, and the air pressure is {weather_data['main']['pressure']} hPa. "
+        f"Visibility is around {int(weather_data['visibility'] / 1000)} km, and winds are blowing at "
+        f"{weather_data['wind']['speed']} km/h."
+    )
+    return {
+        "report": report,
+        "readable": readable
+    }
+
+def _fetch_weather(city: str, refresh: bool = False) -> tuple[dict, float]:
+    '''
+    Returns (current weather details, fetch time) for a city, reading a recent stored
+    observation unless refresh is set. Raises RequestException on API failure.
+    '''
+    if not refresh:
+        stored = weather_store.latest_fetch("weather", city, time.time() - WEATHER_CURRENT_TTL)
+        if stored:
+            return _format_weather(json.loads(stored[-1]["payload"])), stored[-1]["fetched_at"]
+
     url = "http://api.openweathermap.org/data/2.5/weather"
     params = {
         'appid': weather_api,
         'q': city,
         'units': 'metric'
     }
+    # Proactive refreshes are background work and yield to interactive requests
+    acquire("openweather", "background" if refresh else None)
+    response = requests.get(url, params=params)
+    if response.status_code == 429:
+        drain("openweather")
+    response.raise_for_status()
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"Unexpected status {response.status_code}", response=response)
+    weather_data = response.json()
+    fetched_at = time.time()
+    weather_store.append("weather", city, [{
+        "ts": weather_data.get("dt", fetched_at),
+        "fetched_at": fetched_at,
+        "name": weather_data["name"],
+        "temp": weather_data["main"]["temp"],
+        "feels_like": weather_data["main"]["feels_like"],
+        "pressure": weather_data["main"]["pressure"],
+        "humidity": weather_data["main"]["humidity"],
+        "wind": weather_data["wind"]["speed"],
+        "visibility": weather_data.get("visibility"),
+        "description": weather_data["weather"][0]["description"].capitalize(),
+        "payload": json.dumps(weather_data),
+    }])
+    return _format_weather(weather_data), fetched_at
+
+def _get_city(kind: str, city: str) -> dict:
+    '''
+    Looks a city up through the refresh scheduler. OpenWeather gets the name as given
+    (or its exact gazetteer match); a spelling correction is only tried after a 404.
+    The query actually used is returned under "query".
+    '''
+    query = resolve_city_query(city)
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        if response.status_code == 200:
-            weather_data = response.json()
-            report = (
-                f"📍 CITY: {weather_data['name']}\n"
-                f"🌡️ TEMPERATURE: {weather_data['main']['temp']}°C\n"
-                f"🤗 FEELS LIKE: {weather_data['main']['feels_like']}°C\n"
-                f"📈 PRESSURE: {weather_data['main']['pressure']} hPa\n"
-                f"🌥️ CONDITIONS: {weather_data['weather'][0]['description'].capitalize()}\n"
-                f"👁️ VISIBILITY: {weather_data['visibility']} m\n"
-                f"💧 HUMIDITY: {weather_data['main']['humidity']}%\n"
-                f"💨 WIND: {weather_data['wind']['speed']} km/h"
-            )
-            readable = (
-                f"The current weather in {weather_data['name']} is {weather_data['weather'][0]['description'].capitalize()}, "
-                f"with a temperature of {weather_data['main']['temp']}°C, feeling like {weather_data['main']['feels_like']}°C. "
-                f"Humidity is at {weather_data['main']['humidity']}%, and the air pressure is {weather_data['main']['pressure']} hPa. "
-                f"Visibility is around {int(weather_data['visibility'] / 1000)} km, and winds are blowing at "
-                f"{weather_data['wind']['speed']} km/h."
-            )
-            return {
-                "report": report,
-                "readable": readable
-            }
-        else:
-            st.error("error fetching current weather")
-            return {"report": "error getting current weather"}
-            
-    except requests.exceptions.RequestException as e:
+        value = refresh_scheduler.get(kind, query)
+    except requests.exceptions.HTTPError as e:
+        corrected = correct_city_query(city)
+        if e.response is None or e.response.status_code != 404 or not corrected or corrected == query:
+            raise
+        query = corrected
+        value = refresh_scheduler.get(kind, query)
+    return {**value, "query": query}
+
+def get_weather(city: str) -> dict:
+    '''Takes a city name and returns associated current weather details.'''
+    try:
+        return _get_city("weather", city)
+    except (requests.exceptions.RequestException, RateLimitExceeded) as e:
         print(f"Weather API error: {str(e)}")
-        st.error("error fetching current weather")
         return {"report": "error getting current weather"}
     
 
 #forecast
-def get_forecast(city: str) -> dict:
+def _format_forecast(data: dict) -> dict:
     """
-    Fetch 5-day forecast (3-hour intervals) for the specified city.
-    Returns JSON dict or raises an exception.
+    Parses a 5-day forecast API payload into parsed items and a readable string.
     """
+    forecast_list = data.get("list", [])
+    parsed_forecast = []
+    readable_lines = []
+
+    for entry in forecast_list:
+        dt = datetime.fromtimestamp(entry['dt']).strftime("%a %d %b %I:%M %p")
+        temp = entry['main']['temp']
+        desc = entry['weather'][0]['description'].capitalize()
+        wind = entry['wind']['speed']
+        humidity = entry['main']['humidity']
+
+        item = {
+            "datetime": dt,
+            "temp": temp,
+            "description": desc,
+            "wind": wind,
+            "humidity": humidity
+        }
+
+        parsed_forecast.append(item)
+        readable_lines.append(
+            f"{dt}: {desc}, {temp}°C, Wind {wind} m/s, Humidity {humidity}%"
+        )
+
+    return {
+        "raw": data,
+        "parsed": parsed_forecast,
+        "string": "\n".join(readable_lines)
+    }
+
+def _fetch_forecast(city: str, refresh: bool = False) -> tuple[dict, float]:
+    """
+    Returns (parsed forecast, fetch time) for a city, reading a stored forecast from
+    the current 3-hour step unless refresh is set. Raises RequestException on API failure.
+    """
+    if not refresh:
+        step_start = forecast_expiry(time.time()) - FORECAST_INTERVAL
+        stored = weather_store.latest_fetch("forecast", city, step_start)
+        if stored:
+            stored.sort(key=lambda row: row["valid_at"])
+            data = {"list": [json.loads(row["payload"]) for row in stored]}
+            return _format_forecast(data), stored[0]["fetched_at"]
+
     url = 'http://api.openweathermap.org/data/2.5/forecast'
     params = {
         'appid': weather_api,
         'q': city,
         'units': 'metric'
     }
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        forecast_list = data.get("list", [])
-        parsed_forecast = []
-        readable_lines = []
-
-        for entry in forecast_list:
-            dt = datetime.fromtimestamp(entry['dt']).strftime("%a %d %b %I:%M %p")
-            temp = entry['main']['temp']
-            desc = entry['weather'][0]['description'].capitalize()
-            wind = entry['wind']['speed']
-            humidity = entry['main']['humidity']
-
-            item = {
-                "datetime": dt,
-                "temp": temp,
-                "description": desc,
-                "wind": wind,
-                "humidity": humidity
-            }
-
-            parsed_forecast.append(item)
-            readable_lines.append(
-                f"{dt}: {desc}, {temp}°C, Wind {wind} m/s, Humidity {humidity}%"
-            )
-
-        return {
-            "raw": data,
-            "parsed": parsed_forecast,
-            "string": "\n".join(readable_lines)
+    acquire("openweather", "background" if refresh else None)
+    response = requests.get(url, params=params)
+    if response.status_code == 429:
+        drain("openweather")
+    response.raise_for_status()
+    data = response.json()
+    fetched_at = time.time()
+    weather_store.append("forecast", city, [
+        {
+            "ts": fetched_at,
+            "fetched_at": fetched_at,
+            "valid_at": entry["dt"],
+            "temp": entry["main"]["temp"],
+            "humidity": entry["main"]["humidity"],
+            "wind": entry["wind"]["speed"],
+            "description": entry["weather"][0]["description"].capitalize(),
+            "payload": json.dumps(entry),
         }
-    except requests.exceptions.RequestException as e:
+        for entry in data.get("list", [])
+    ])
+    return _format_forecast(data), fetched_at
+
+def get_forecast(city: str) -> dict:
+    """
+    Fetch 5-day forecast (3-hour intervals) for the specified city.
+    Returns JSON dict or raises an exception.
+    """
+    try:
+        return _get_city("forecast", city)
+    except (requests.exceptions.RequestException, RateLimitExceeded) as e:
         print(f"Forecast API error: {str(e)}")
-        st.error("error fetching forecast weather")
         return {}
 
+# Hot cities are kept warm in the background and served stale-while-revalidate
+refresh_scheduler.register("weather", _fetch_weather, current_weather_expiry)
+refresh_scheduler.register("forecast", _fetch_forecast, forecast_expiry)
 
 
-#graph
-def plot_forecast_graph(parsed_list, limit=40, key="forecast_plot"):
- 
-
-    df = pd.DataFrame(parsed_list[:limit])
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(
-        x=df["datetime"],
-        y=df["temp"],
-        mode='lines+markers',
-        name='Temperature (°C)',
-        line=dict(color='orange')
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=df["datetime"],
-        y=df["humidity"],
-        mode='lines',
-        name='Humidity (%)',
-        line=dict(color='blue', dash='dot')
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=df["datetime"],
-        y=df["wind"],
-        mode='lines',
-        name='Wind Speed (m/s)',
-        line=dict(color='green', dash='dash')
-    ))
-
-    fig.update_layout(
-        title="📈 Weather Forecast Trends",
-        xaxis_title="Date & Time",
-        yaxis_title="Values",
-        hovermode="x unified",
-        template="plotly_white",
-        autosize=True,
-        margin=dict(l=20, r=20, t=40, b=20),
-        height=450
+
+#forecast vs observed history
+def get_forecast_comparison(city: str) -> str:
+    """
+    Compares what was forecast at least 12 hours in advance with what was observed
+    over the last 24 hours, using the local weather store.
+    """
+    # Fetches are stored under the OpenWeather query, not the name as typed
+    store_city = resolve_city_query(city)
+    now = time.time()
+    window_start = now - 24 * 3600
+    observed = weather_store.query("weather", store_city, window_start, now, columns=["ts", "temp", "description"])
+    if not observed:
+        return f"No stored observations for {city} in the last 24 hours."
+
+    forecasts = weather_store.query(
+        "forecast", store_city, now - 60 * 3600, now - 12 * 3600,
+        columns=["fetched_at", "valid_at", "temp", "description"]
     )
+    # For each forecast step in the window keep the latest forecast issued 12+ hours before it
+    issued = {}
+    for row in forecasts:
+        valid_at = row["valid_at"]
+        if window_start <= valid_at <= now and row["fetched_at"] <= valid_at - 12 * 3600:
+            if valid_at not in issued or row["fetched_at"] > issued[valid_at]["fetched_at"]:
+                issued[valid_at] = row
+
+    lines = []
+    for valid_at in sorted(issued):
+        nearest = min(observed, key=lambda obs: abs(obs["ts"] - valid_at))
+        if abs(nearest["ts"] - valid_at) > 90 * 60:
+            continue
+        forecast = issued[valid_at]
+        dt = datetime.fromtimestamp(valid_at).strftime("%a %d %b %I:%M %p")
+        lines.append(
+            f"{dt}: forecast {forecast['temp']}°C ({forecast['description']}), "
+            f"observed {nearest['temp']}°C ({nearest['description']})"
+        )
 
-    st.markdown("### 📊 Forecast Graph")
-    st.plotly_chart(fig, use_container_width=True, key=key)
+    if not lines:
+        latest = observed[-1]
+        return (
+            f"No earlier forecast for {city} is stored to compare with. "
+            f"Latest stored observation: {latest['temp']}°C, {latest['description']}."
+        )
+    return "\n".join(lines)
 
 
 
@@ -162,8 +259,9 @@ def get_time_and_date(city: str) -> str:
     Returns the current local time and date for a given city 
     """
     try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={weather_api}"
-        response = requests.get(url)
+        url = "https://api.openweathermap.org/data/2.5/weather"
+        acquire("openweather")
+        response = requests.get(url, params={'q': resolve_city_query(city), 'appid': weather_api})
         data = response.json()
 
         if response.status_code != 200 or "dt" not in data:
@@ -1,14 +1,23 @@
 import os
+import re
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from speechify import Speechify
 from speechify.tts import GetSpeechOptionsRequest
 import base64
 import streamlit as st
 
+from audio_cache import audio_cache, make_cache_key
+from voice_catalog import VoiceCatalog, VoiceIndex
+from quota import acquire
+
 # Load API key
 load_dotenv()
 SPEECHIFY_API_KEY = os.getenv("SPEECHIFY_API_KEY")
+TTS_CHUNK_MAX_CHARS = int(os.getenv("TTS_CHUNK_MAX_CHARS", "400"))
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", "4"))
+TTS_VOICE_CATALOG_TTL = float(os.getenv("TTS_VOICE_CATALOG_TTL", "3600"))
 
 # Initialize Speechify client
 speechify_client = None
@@ -18,6 +27,69 @@ if SPEECHIFY_API_KEY:
     except Exception as e:
         print(f"Failed to initialize Speechify client: {e}")
 
+# Convert ElevenLabs voice IDs to Speechify voice IDs for backward compatibility
+VOICE_MAPPING = {
+    "21m00Tcm4TlvDq8ikWAM": "scott",  # Rachel -> scott
+    "EXAVITQu4vr4xnSDxMaL": "scott",  # Bella -> scott  
+    "AZnzlk1XvdvUeBnXmlld": "scott",  # Antoni -> scott
+    "IKne3meq5aSn9XLyUdCD": "scott",  # Daniel -> scott
+}
+
+def resolve_voice_and_model(text: str, voice_id: str) -> tuple[str, str]:
+    """
+    Map a voice ID to its Speechify voice ID and pick the synthesis model.
+    
+    Args:
+        text (str): Text to convert to speech
+        voice_id (str): Voice ID requested by the caller
+        
+    Returns:
+        tuple[str, str]: (Speechify voice ID, model name)
+    """
+    # Use mapped voice_id or fallback to provided voice_id
+    speechify_voice_id = VOICE_MAPPING.get(voice_id, voice_id)
+    
+    # Determine if text contains non-English characters to choose appropriate model
+    # Simple heuristic: if text contains non-ASCII characters, use multilingual model
+    is_multilingual = any(ord(char) > 127 for char in text)
+    model = "simba-multilingual" if is_multilingual else "simba-english"
+    return speechify_voice_id, model
+
+def synthesize_bytes(text: str, voice_id: str, model: str | None = None) -> tuple[bytes, str | None]:
+    """
+    Return MP3 bytes for `text`, served from the on-disk audio cache when possible.
+    
+    Raises on API errors; callers are responsible for reporting them.
+    
+    Returns:
+        tuple[bytes, str | None]: (MP3 bytes, path of the cached clip or None if
+            it could not be cached)
+    """
+    speechify_voice_id, detected_model = resolve_voice_and_model(text, voice_id)
+    model = model or detected_model
+    key = make_cache_key(text, speechify_voice_id, model)
+    
+    cached = audio_cache.lookup(key)
+    if cached is not None:
+        return cached
+    
+    # Make TTS request within the shared Speechify rate limit
+    acquire("speechify")
+    audio_response = speechify_client.tts.audio.speech(
+        audio_format="mp3",
+        input=text,
+        model=model,
+        options=GetSpeechOptionsRequest(
+            loudness_normalization=True,
+            text_normalization=True
+        ),
+        voice_id=speechify_voice_id
+    )
+    
+    # Decode base64 audio data once and keep the raw MP3 on disk
+    audio_bytes = base64.b64decode(audio_response.audio_data)
+    return audio_bytes, audio_cache.put(key, audio_bytes)
+
 def text_to_speech(text: str, voice_id: str) -> BytesIO | None:
     """
     Convert text to speech using Speechify API.
@@ -35,41 +107,150 @@ def text_to_speech(text: str, voice_id: str) -> BytesIO | None:
         return None
     
     try:
-        # Convert ElevenLabs voice IDs to Speechify voice IDs for backward compatibility
-        voice_mapping = {
-            "21m00Tcm4TlvDq8ikWAM": "scott",  # Rachel -> scott
-            "EXAVITQu4vr4xnSDxMaL": "scott",  # Bella -> scott  
-            "AZnzlk1XvdvUeBnXmlld": "scott",  # Antoni -> scott
-            "IKne3meq5aSn9XLyUdCD": "scott",  # Daniel -> scott
-        }
+        audio_bytes, _ = synthesize_bytes(text, voice_id)
+        
+        # Create BytesIO stream
+        audio_stream = BytesIO(audio_bytes)
+        audio_stream.seek(0)
+        
+        return audio_stream
+        
+    except Exception as e:
+        print(f"TTS error: {e}")
+        st.markdown("error")
+        return None
+
+def text_to_speech_file(text: str, voice_id: str) -> str | BytesIO | None:
+    """
+    Convert text to speech and return the path of the cached MP3 file.
+    
+    Args:
+        text (str): Text to convert to speech
+        voice_id (str): Voice ID to use for synthesis
         
-        # Use mapped voice_id or fallback to provided voice_id
-        speechify_voice_id = voice_mapping.get(voice_id, voice_id)
+    Returns:
+        str | BytesIO | None: Path to an MP3 file in the audio cache, an audio
+            stream if the clip could not be cached, or None if error occurs
+    """
+    if not speechify_client:
+        print("Speechify client not initialized. Check SPEECHIFY_API_KEY in .env")
+        return None
+    
+    try:
+        audio_bytes, path = synthesize_bytes(text, voice_id)
+        # A clip the cache could not store has still been paid for, so play it from memory
+        return path if path else BytesIO(audio_bytes)
+    except Exception as e:
+        print(f"TTS error: {e}")
+        return None
+
+def split_into_chunks(text: str, max_chars: int = TTS_CHUNK_MAX_CHARS) -> list[str]:
+    """
+    Split text at sentence boundaries into chunks of at most `max_chars`.
+    
+    The first sentence is always its own chunk so playback can start early;
+    a single sentence longer than `max_chars` is kept whole.
+    """
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?…])\s+|\n+", text) if s.strip()]
+    if not sentences:
+        return []
+    
+    chunks = [sentences[0]]
+    current = ""
+    for sentence in sentences[1:]:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _strip_id3(audio_bytes: bytes, *, keep_header: bool, keep_trailer: bool) -> bytes:
+    """Remove the leading ID3v2 and/or trailing ID3v1 tag from an MP3 clip."""
+    if not keep_header and audio_bytes[:3] == b"ID3" and len(audio_bytes) >= 10:
+        # Tag size is a 28-bit syncsafe integer, excluding the 10-byte header
+        size = 0
+        for byte in audio_bytes[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if audio_bytes[5] & 0x10 else 0
+        audio_bytes = audio_bytes[10 + size + footer:]
+    if not keep_trailer and len(audio_bytes) >= 128 and audio_bytes[-128:-125] == b"TAG":
+        audio_bytes = audio_bytes[:-128]
+    return audio_bytes
+
+def join_mp3_chunks(chunks: list[bytes]) -> bytes:
+    """
+    Join MP3 clips into a single stream.
+    
+    MP3 frames can be concatenated directly; only the ID3 tags between clips
+    are dropped so players do not stop at the first clip boundary.
+    """
+    last = len(chunks) - 1
+    return b"".join(
+        _strip_id3(chunk, keep_header=(i == 0), keep_trailer=(i == last))
+        for i, chunk in enumerate(chunks)
+    )
+
+def iter_speech_chunks(text: str, voice_id: str, max_workers: int = TTS_MAX_PARALLEL):
+    """
+    Synthesize sentence chunks of `text` concurrently and yield them in order.
+    
+    Args:
+        text (str): Text to convert to speech
+        voice_id (str): Voice ID to use for synthesis
+        max_workers (int): Maximum concurrent Speechify requests
         
-        # Determine if text contains non-English characters to choose appropriate model
-        # Simple heuristic: if text contains non-ASCII characters, use multilingual model
-        is_multilingual = any(ord(char) > 127 for char in text)
-        model = "simba-multilingual" if is_multilingual else "simba-english"
+    Yields:
+        bytes: MP3 bytes of each chunk, as soon as it and all earlier chunks are ready
+    """
+    chunks = split_into_chunks(text)
+    if not chunks:
+        return
+    
+    # Use one model for the whole answer so the voice stays consistent across chunks
+    _, model = resolve_voice_and_model(text, voice_id)
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))))
+    try:
+        futures = [executor.submit(synthesize_bytes, chunk, voice_id, model) for chunk in chunks]
+        for future in futures:
+            yield future.result()[0]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def text_to_speech_chunked(text: str, voice_id: str, on_first_chunk=None) -> BytesIO | None:
+    """
+    Convert text to speech in parallel sentence chunks.
+    
+    Args:
+        text (str): Text to convert to speech
+        voice_id (str): Voice ID to use for synthesis
+        on_first_chunk (callable, optional): Called with the first chunk's MP3 bytes
+            as soon as it is ready, when the text has more than one chunk
         
-        # Make TTS request
-        audio_response = speechify_client.tts.audio.speech(
-            audio_format="mp3",
-            input=text,
-            model=model,
-            options=GetSpeechOptionsRequest(
-                loudness_normalization=True,
-                text_normalization=True
-            ),
-            voice_id=speechify_voice_id
-        )
+    Returns:
+        BytesIO | None: Joined audio stream or None if error occurs
+    """
+    if not speechify_client:
+        print("Speechify client not initialized. Check SPEECHIFY_API_KEY in .env")
+        st.markdown("error")
+        return None
+    
+    try:
+        multi_chunk = len(split_into_chunks(text)) > 1
+        audio_chunks = []
+        for audio_bytes in iter_speech_chunks(text, voice_id):
+            if not audio_chunks and multi_chunk and on_first_chunk:
+                on_first_chunk(audio_bytes)
+            audio_chunks.append(audio_bytes)
         
-        # Decode base64 audio data
-        audio_bytes = base64.b64decode(audio_response.audio_data)
+        if not audio_chunks:
+            return None
         
-        # Create BytesIO stream
-        audio_stream = BytesIO(audio_bytes)
+        audio_stream = BytesIO(join_mp3_chunks(audio_chunks))
         audio_stream.seek(0)
-        
         return audio_stream
         
     except Exception as e:
@@ -77,17 +258,25 @@ def text_to_speech(text: str, voice_id: str) -> BytesIO | None:
         st.markdown("error")
         return None
 
-def get_available_voices():
+def get_tts_cache_stats() -> dict:
     """
-    Get available Speechify voices.
+    Get audio cache statistics (hits, misses, hit_rate, entries, size_bytes).
+    """
+    return audio_cache.stats()
+
+def _fetch_voices():
+    """
+    Fetch the voice list from the Speechify API.
     
     Returns:
-        list: List of available voice objects
+        list | None: List of voice objects (empty without a client) or None if the call failed
     """
+    # Without a client there is nothing to retry; an empty list is cached for the full TTL
     if not speechify_client:
         return []
     
     try:
+        acquire("speechify")
         voices_response = speechify_client.tts.voices.list()
         # The response might be a list directly or have a .voices attribute
         if hasattr(voices_response, 'voices'):
@@ -99,7 +288,28 @@ def get_available_voices():
             return []
     except Exception as e:
         print(f"Error fetching voices: {e}")
+        return None
+
+# Voice list cached with a TTL and refreshed in the background
+voice_catalog = VoiceCatalog(_fetch_voices, ttl=TTS_VOICE_CATALOG_TTL)
+
+def get_voice_catalog() -> VoiceCatalog:
+    """
+    Get the shared voice catalog; use `get_voice_catalog().get_index()` for indexed filtering.
+    """
+    return voice_catalog
+
+def get_available_voices():
+    """
+    Get available Speechify voices.
+    
+    Returns:
+        list: List of available voice objects
+    """
+    if not speechify_client:
         return []
+    
+    return voice_catalog.get_voices()
 
 def filter_voice_models(voices, *, gender=None, locale=None, tags=None):
     """
@@ -115,28 +325,8 @@ def filter_voice_models(voices, *, gender=None, locale=None, tags=None):
     Returns:
         list[str]: IDs of matching voice models.
     """
-    results = []
-
-    for voice in voices:
-        # gender filter
-        if gender and voice.gender.lower() != gender.lower():
-            continue
-
-        # locale filter (check across models and languages)
-        if locale:
-            if not any(
-                any(lang.locale == locale for lang in model.languages)
-                for model in voice.models
-            ):
-                continue
-
-        # tags filter
-        if tags:
-            if not all(tag in voice.tags for tag in tags):
-                continue
-
-        # If we got here, the voice matches -> collect model ids
-        for model in voice.models:
-            results.append(model.name)
-
-    return results
\ No newline at end of file
+    # Reuse the catalog's prebuilt index when filtering the cached list
+    index = voice_catalog.peek_index()
+    if index is None or voices is not index.voices:
+        index = VoiceIndex(voices)
+    return index.filter_models(gender=gender, locale=locale, tags=tags)
@@ -0,0 +1,129 @@
+import time
+import threading
+from collections import defaultdict
+
+
+class VoiceIndex:
+    """
+    Immutable snapshot of a voice list with lookup sets by gender, locale and tag.
+
+    Filters are answered by intersecting the sets of matching voice positions,
+    so results keep the order of the original list.
+    """
+
+    def __init__(self, voices):
+        self.voices = list(voices)
+        self.by_gender = defaultdict(set)
+        self.by_locale = defaultdict(set)
+        self.by_tag = defaultdict(set)
+
+        for position, voice in enumerate(self.voices):
+            if getattr(voice, "gender", None):
+                self.by_gender[voice.gender.lower()].add(position)
+            for model in getattr(voice, "models", None) or []:
+                for lang in getattr(model, "languages", None) or []:
+                    self.by_locale[lang.locale].add(position)
+            for tag in getattr(voice, "tags", None) or []:
+                self.by_tag[tag].add(position)
+
+    @property
+    def genders(self) -> list[str]:
+        return sorted(self.by_gender)
+
+    @property
+    def locales(self) -> list[str]:
+        return sorted(self.by_locale)
+
+    @property
+    def tags(self) -> list[str]:
+        return sorted(self.by_tag)
+
+    def _match(self, gender=None, locale=None, tags=None) -> list[int]:
+        candidate_sets = []
+        if gender:
+            candidate_sets.append(self.by_gender.get(gender.lower(), set()))
+        if locale:
+            candidate_sets.append(self.by_locale.get(locale, set()))
+        for tag in tags or []:
+            candidate_sets.append(self.by_tag.get(tag, set()))
+
+        if not candidate_sets:
+            return list(range(len(self.voices)))
+        # Intersect starting from the smallest set
+        candidate_sets.sort(key=len)
+        return sorted(set.intersection(*candidate_sets))
+
+    def filter_voices(self, *, gender=None, locale=None, tags=None) -> list:
+        """Return voice objects matching every given filter."""
+        return [self.voices[i] for i in self._match(gender, locale, tags)]
+
+    def filter_models(self, *, gender=None, locale=None, tags=None) -> list[str]:
+        """Return model names of voices matching every given filter."""
+        return [
+            model.name
+            for i in self._match(gender, locale, tags)
+            for model in self.voices[i].models
+        ]
+
+
+class VoiceCatalog:
+    """
+    Voice list cached for `ttl` seconds and refreshed in the background.
+
+    `fetch` returns a list of voices, or None when the listing call failed.
+    Once a list has been loaded, stale reads return it immediately while a
+    single background thread fetches the new one.
+    """
+
+    def __init__(self, fetch, ttl: float = 3600, retry_after: float = 60):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._index = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+    def _refresh(self):
+        voices = self.fetch()
+        with self._lock:
+            if voices is not None:
+                self._index = VoiceIndex(voices)
+                self._expires_at = time.monotonic() + self.ttl
+            else:
+                if self._index is None:
+                    self._index = VoiceIndex([])
+                self._expires_at = time.monotonic() + self.retry_after
+            self._refreshing = False
+
+    def get_index(self) -> VoiceIndex:
+        """Return the current index, loading it on first use."""
+        with self._lock:
+            index = self._index
+            stale = time.monotonic() >= self._expires_at
+            start_background = stale and index is not None and not self._refreshing
+            if start_background or index is None:
+                self._refreshing = True
+
+        if index is None:
+            # Only one caller performs the initial blocking load
+            with self._load_lock:
+                if self._index is None:
+                    self._refresh()
+            return self._index
+        if start_background:
+            threading.Thread(target=self._refresh, name="voice-catalog-refresh", daemon=True).start()
+        return index
+
+    def peek_index(self) -> VoiceIndex | None:
+        """Return the loaded index without triggering a fetch or refresh."""
+        return self._index
+
+    def get_voices(self) -> list:
+        return self.get_index().voices
+
+    def invalidate(self):
+        """Mark the cached list stale so the next read triggers a refresh."""
+        with self._lock:
+            self._expires_at = 0.0
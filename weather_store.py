@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import gzip
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+from refresh_scheduler import normalize_city
+
+load_dotenv()
+WEATHER_STORE_DIR = os.getenv("WEATHER_STORE_DIR", os.path.join("data", "weather_store"))
+# Merge a day's segments into one once it has this many
+WEATHER_STORE_COMPACT_AT = int(os.getenv("WEATHER_STORE_COMPACT_AT", "32"))
+
+SEGMENT_SUFFIX = ".json.gz"
+
+
+def _city_dir_name(city: str) -> str:
+    return re.sub(r"[^\w-]+", "_", normalize_city(city)) or "_"
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class WeatherStore:
+    """
+    Append-only local store of fetched observations and forecasts.
+
+    Data is partitioned as `<root>/<kind>/<city>/<YYYY-MM-DD>/` (UTC day of the
+    row timestamp). Every append writes a new gzip-compressed columnar segment
+    named `<min_ts>-<max_ts>-<id>.json.gz`, so range queries skip partitions and
+    segments by name and never rewrite existing files except during compaction.
+    Every row has a `ts` column; observations use the measurement time and
+    forecast rows use the time they were fetched.
+    """
+
+    def __init__(self, root: str = WEATHER_STORE_DIR, compact_at: int = WEATHER_STORE_COMPACT_AT):
+        self.root = root
+        self.compact_at = compact_at
+
+    def _partition(self, kind: str, city: str, day: str) -> str:
+        return os.path.join(self.root, kind, _city_dir_name(city), day)
+
+    def append(self, kind: str, city: str, rows: list[dict]):
+        """
+        Append rows for a city; rows are split into one segment per UTC day.
+
+        Args:
+            kind (str): "weather" or "forecast"
+            city (str): City name as queried
+            rows (list[dict]): Rows with identical keys, including a numeric `ts`
+        """
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(_day(row["ts"]), []).append(row)
+
+        for day, day_rows in by_day.items():
+            partition = self._partition(kind, city, day)
+            try:
+                os.makedirs(partition, exist_ok=True)
+                self._write_segment(partition, day_rows)
+                self._maybe_compact(partition)
+            except OSError as e:
+                print(f"Weather store write error: {e}")
+
+    def _write_segment(self, partition: str, rows: list[dict]):
+        columns = {name: [row.get(name) for row in rows] for name in rows[0]}
+        min_ts = int(min(columns["ts"]))
+        max_ts = int(max(columns["ts"]))
+        name = f"{min_ts}-{max_ts}-{uuid.uuid4().hex}{SEGMENT_SUFFIX}"
+        tmp_path = os.path.join(partition, f".{name}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"rows": len(rows), "columns": columns}, f)
+        os.replace(tmp_path, os.path.join(partition, name))
+
+    def _segments(self, partition: str, start: float, end: float) -> list[str]:
+        """Segment paths in a partition whose ts range overlaps [start, end]."""
+        try:
+            names = os.listdir(partition)
+        except OSError:
+            return []
+        paths = []
+        for name in names:
+            if not name.endswith(SEGMENT_SUFFIX) or name.startswith("."):
+                continue
+            min_ts, max_ts, _ = name.split("-", 2)
+            if int(max_ts) >= int(start) and int(min_ts) <= end:
+                paths.append(os.path.join(partition, name))
+        return sorted(paths)
+
+    @staticmethod
+    def _read_segment(path: str) -> dict | None:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)["columns"]
+        except (OSError, ValueError, KeyError):
+            # Removed by a concurrent compaction, or partially written
+            return None
+
+    def _maybe_compact(self, partition: str):
+        """Merge a partition's segments into one when it has grown past compact_at."""
+        segments = self._segments(partition, 0, float("inf"))
+        if len(segments) < self.compact_at:
+            return
+
+        lock_path = os.path.join(partition, ".compact.lock")
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            # Another process is compacting; clear the lock only if it was abandoned
+            try:
+                if time.time() - os.path.getmtime(lock_path) > 60:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            return
+        os.close(fd)
+        try:
+            merged = []
+            for path in segments:
+                columns = self._read_segment(path)
+                if columns:
+                    names = list(columns)
+                    merged.extend(dict(zip(names, values)) for values in zip(*columns.values()))
+            if merged:
+                merged.sort(key=lambda row: row["ts"])
+                self._write_segment(partition, merged)
+            for path in segments:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        finally:
+            os.remove(lock_path)
+
+    def query(self, kind: str, city: str, start: float, end: float | None = None,
+              columns: list[str] | None = None) -> list[dict]:
+        """
+        Return rows for a city with `start <= ts <= end`, ordered by ts.
+
+        Args:
+            kind (str): "weather" or "forecast"
+            city (str): City name as queried
+            start (float): Window start (Unix seconds)
+            end (float, optional): Window end, defaults to now
+            columns (list[str], optional): Columns to return; all by default
+        """
+        end = time.time() if end is None else end
+        rows = []
+        day = datetime.fromtimestamp(start, tz=timezone.utc).date()
+        last_day = datetime.fromtimestamp(end, tz=timezone.utc).date()
+        while day <= last_day:
+            partition = self._partition(kind, city, day.isoformat())
+            for path in self._segments(partition, start, end):
+                data = self._read_segment(path)
+                if not data:
+                    continue
+                names = columns or list(data)
+                ts_column = data["ts"]
+                for i, ts in enumerate(ts_column):
+                    if start <= ts <= end:
+                        rows.append({name: data[name][i] for name in names if name in data})
+            day += timedelta(days=1)
+        rows.sort(key=lambda row: row.get("ts", 0))
+        return rows
+
+    def latest_fetch(self, kind: str, city: str, since: float) -> list[dict]:
+        """
+        Return the rows written by the most recent fetch at or after `since`.
+        """
+        # Observations are stamped with their measurement time, which can lag the fetch
+        rows = [row for row in self.query(kind, city, since - 3600) if row["fetched_at"] >= since]
+        if not rows:
+            return []
+        last_fetch = max(row["fetched_at"] for row in rows)
+        return [row for row in rows if row["fetched_at"] == last_fetch]
+
+
+# Shared store used by tools.py
+weather_store = WeatherStore()